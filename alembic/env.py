@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -21,8 +22,21 @@ if config.config_file_name is not None:
 from app.database import Base
 from app.models.user import User
 from app.models.product import Product
+from app.models.stored_image import StoredImage
+from app.models.job import DeadLetterJob, Job
+from app.models.processed_event import ProcessedEvent
+from app.models.cache_invalidation import CacheInvalidation
 target_metadata = Base.metadata
 
+# DATABASE_URL from the environment wins over sqlalchemy.url in alembic.ini
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # products_fts and its shadow tables are managed by hand-written migrations
+    return not (type_ == "table" and reflected and name.startswith("products_fts"))
+
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -48,6 +62,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -69,7 +84,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
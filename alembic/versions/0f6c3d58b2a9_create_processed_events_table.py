@@ -0,0 +1,38 @@
+"""create processed_events table
+
+Revision ID: 0f6c3d58b2a9
+Revises: e4a90b3f7c15
+Create Date: 2026-10-18 14:26:03.118452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f6c3d58b2a9'
+down_revision: Union[str, Sequence[str], None] = 'e4a90b3f7c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processed_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('processed_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_processed_events_event_id'), 'processed_events', ['event_id'], unique=True)
+    op.create_index(op.f('ix_processed_events_id'), 'processed_events', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_processed_events_id'), table_name='processed_events')
+    op.drop_index(op.f('ix_processed_events_event_id'), table_name='processed_events')
+    op.drop_table('processed_events')
@@ -0,0 +1,30 @@
+"""add stripe ids to products
+
+Revision ID: 7a3e9c1d4b62
+Revises: 0f6c3d58b2a9
+Create Date: 2026-10-18 15:02:41.530217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e9c1d4b62'
+down_revision: Union[str, Sequence[str], None] = '0f6c3d58b2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('stripe_product_id', sa.String(), nullable=True))
+    op.add_column('products', sa.Column('stripe_price_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'stripe_price_id')
+    op.drop_column('products', 'stripe_product_id')
@@ -1,9 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app import models
-from app.database import get_db
+from app.auth.cache import Principal, principal_cache
+from app.auth.tokens import verify_token
+from app.database import get_async_read_db, get_read_db
 from app.models.user import User
 from app.schemas.token import TokenData
 from app.schemas.user import UserType 
@@ -11,28 +14,44 @@ from app.schemas.user import UserType
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-SECRET_KEY = "your-secret-key"
-ALGORITHM = "HS256"
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        user_type = payload.get("user_type")
-        if email is None or user_type is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.email == email).first()
+
+def get_token_subject(token: str) -> str:
+    payload = verify_token(token)
+    if payload is None:
+        raise credentials_exception()
+    email: str = payload.get("sub")
+    user_type = payload.get("user_type")
+    if email is None or user_type is None:
+        raise credentials_exception()
+    return email
+
+def _remember(email: str, user: User) -> Principal:
     if user is None:
-        raise credentials_exception
-    return user
+        raise credentials_exception()
+    principal = Principal.from_user(user)
+    principal_cache.set(email, principal)
+    return principal
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    email = get_token_subject(token)
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+    return _remember(email, db.query(User).filter(User.email == email).first())
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)):
+    email = get_token_subject(token)
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+    result = await db.execute(select(User).where(User.email == email))
+    return _remember(email, result.scalars().first())
 
 def is_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.user_type != 'admin':
@@ -42,7 +61,13 @@ def is_admin_user(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+async def is_admin_user_async(current_user: User = Depends(get_current_user_async)):
+    return is_admin_user(current_user)
+
 async def allow_admin(current_user: User = Depends(get_current_user)):
     if current_user.user_type != UserType.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
+
+async def allow_admin_async(current_user: User = Depends(get_current_user_async)):
+    return await allow_admin(current_user)
@@ -1,6 +1,20 @@
+import asyncio
+import math
+from typing import List, Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import BCRYPT_ROUNDS, HASH_POOL_WORKERS
+from app.utils.pools import get_process_pool
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    # Pinning min/max to the configured cost makes needs_update() flag any other cost
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 class Hasher:
     @staticmethod
@@ -10,3 +24,45 @@ class Hasher:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
+
+    @staticmethod
+    def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify, returning a replacement hash when the stored one uses an outdated cost."""
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# bcrypt holds the GIL for the whole computation, so the variants below run
+# the Hasher on a dedicated process pool and leave the worker free to serve
+# other requests. Set HASH_POOL_WORKERS=0 to hash on the calling thread.
+
+def _submit(fn, *args):
+    return get_process_pool("hashing", HASH_POOL_WORKERS).submit(fn, *args)
+
+def hash_password(password: str) -> str:
+    if HASH_POOL_WORKERS <= 0:
+        return Hasher.get_password_hash(password)
+    return _submit(Hasher.get_password_hash, password).result()
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch in parallel across every pool worker, preserving order."""
+    if HASH_POOL_WORKERS <= 0:
+        return [Hasher.get_password_hash(password) for password in passwords]
+    # A few chunks per worker keeps them all busy without a round trip per password
+    chunksize = max(1, math.ceil(len(passwords) / (HASH_POOL_WORKERS * 4)))
+    pool = get_process_pool("hashing", HASH_POOL_WORKERS)
+    return list(pool.map(Hasher.get_password_hash, passwords, chunksize=chunksize))
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if HASH_POOL_WORKERS <= 0:
+        return Hasher.verify_and_update(plain_password, hashed_password)
+    return _submit(Hasher.verify_and_update, plain_password, hashed_password).result()
+
+async def hash_password_async(password: str) -> str:
+    if HASH_POOL_WORKERS <= 0:
+        return await asyncio.to_thread(Hasher.get_password_hash, password)
+    return await asyncio.wrap_future(_submit(Hasher.get_password_hash, password))
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if HASH_POOL_WORKERS <= 0:
+        return await asyncio.to_thread(Hasher.verify_and_update, plain_password, hashed_password)
+    return await asyncio.wrap_future(_submit(Hasher.verify_and_update, plain_password, hashed_password))
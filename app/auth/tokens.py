@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from jose import JWTError, jwt
+
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, JWT_ALGORITHM, JWT_SECRET_KEY, TOKEN_CACHE_SIZE
+
+
+class TokenService:
+    """Issues and verifies access tokens, remembering verified payloads until they expire.
+
+    The cache is keyed by a SHA-256 digest of the token, so the bearer
+    strings themselves are never held in memory, and a hit means the exact
+    same token already passed signature and claim checks. Entries expire at
+    the token's ``exp``; tokens without one are verified every time.
+    """
+
+    def __init__(
+        self,
+        secret_key: str = JWT_SECRET_KEY,
+        algorithm: str = JWT_ALGORITHM,
+        expire_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES,
+        cache_size: int = TOKEN_CACHE_SIZE,
+        clock=time.time,
+    ):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.expire_minutes = expire_minutes
+        self.cache_size = cache_size
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def create_access_token(self, data: dict) -> str:
+        to_encode = data.copy()
+        to_encode["exp"] = datetime.now(timezone.utc) + timedelta(minutes=self.expire_minutes)
+        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Optional[dict]:
+        """Payload of a valid token, or None; the returned dict is the caller's to modify."""
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+
+        expires = payload.get("exp")
+        if self.cache_size > 0 and isinstance(expires, (int, float)):
+            with self._lock:
+                self._entries[key] = (expires, payload)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.cache_size:
+                    self._entries.popitem(last=False)
+        return dict(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_service = TokenService()
+
+
+def create_access_token(data: dict) -> str:
+    return token_service.create_access_token(data)
+
+
+def verify_token(token: str) -> Optional[dict]:
+    return token_service.decode(token)
@@ -0,0 +1,40 @@
+"""Command-line bulk loaders, sharing the import code behind the admin endpoints.
+
+    python -m app.cli import-users seats.csv
+    python -m app.cli import-products catalog.ndjson --batch-size 2000
+"""
+import argparse
+import json
+import sys
+
+from app.config import IMPORT_BATCH_SIZE
+from app.database import sessionlocal
+from app.utils.imports import guess_format, import_products, import_users
+from app.utils.pools import shutdown_pools
+
+COMMANDS = {
+    "import-users": import_users,
+    "import-products": import_products,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", dest="fmt", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.path, "rb") as f, sessionlocal() as db:
+            report = COMMANDS[args.command](db, f, args.fmt or guess_format(args.path, None), args.batch_size)
+    finally:
+        shutdown_pools()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
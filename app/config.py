@@ -14,4 +14,108 @@ SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 
 FROM_EMAIL = os.getenv("FROM_EMAIL")
 
+# Serve users/products through AsyncSession-backed routers instead of the threadpool ones
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
 
+# Resolved principals kept per worker by get_current_user
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+# bcrypt work factor; stored hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Processes dedicated to password hashing (0 hashes on the calling thread)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+# Product image uploads are copied to disk this many bytes at a time and rejected past the maximum
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Derivatives generated for every stored product image, as name:max-edge-pixels pairs
+IMAGE_VARIANTS = os.getenv("IMAGE_VARIANTS", "thumb:200,medium:800")
+# Processes rendering image derivatives (0 renders inline on the request thread)
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+# Persistent background job queue (Stripe webhook side effects)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Running jobs older than this are assumed to belong to a dead worker and are retried
+JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", "300"))
+
+# Stripe event ids remembered in memory to short-circuit redeliveries before touching the database
+RECENT_EVENT_IDS = int(os.getenv("RECENT_EVENT_IDS", "10000"))
+# Seconds processed_events rows are kept; Stripe stops redelivering an event after three days
+PROCESSED_EVENT_RETENTION = float(os.getenv("PROCESSED_EVENT_RETENTION", str(4 * 24 * 3600)))
+
+# Processes rendering invoice PDFs (0 renders on the calling thread)
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+# Email delivery: SendGrid endpoint (point at benchmarks/fake_sendgrid.py to test offline),
+# batching window for identical mail sent through EmailDelivery.submit, and retry policy
+SENDGRID_API_URL = os.getenv("SENDGRID_API_URL", "https://api.sendgrid.com")
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+EMAIL_BATCH_WINDOW = float(os.getenv("EMAIL_BATCH_WINDOW", "0.05"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "4"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "0.5"))
+EMAIL_MAX_CONNECTIONS = int(os.getenv("EMAIL_MAX_CONNECTIONS", "10"))
+
+# Bulk product import: rows per upsert transaction, and how many row errors to report
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+
+# Full-text search ranks at most this many of the newest matching products (0 = rank every match).
+# Opt-in: with a window, older products never show up for common words however well they match.
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "0"))
+
+# Cache-Control sent with catalog reads; clients revalidate with If-None-Match
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "private, no-cache")
+
+# Serve the product and user lists as column rows rendered straight to JSON by orjson,
+# skipping ORM objects and response-model validation (needs the orjson package)
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+# Database connection; the async engine uses the same file through aiosqlite unless overridden
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./users.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+# Connections per engine; GET routes use a separate read-only pool of DB_READ_POOL_SIZE
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Pragmas applied to every SQLite connection: WAL lets readers run alongside the writer,
+# busy_timeout makes writers wait for the lock instead of failing with "database is locked"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024)))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Record per-route latency, in-flight requests and SQL statements per request, served on /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Opt-in query instrumentation: log statements slower than SLOW_QUERY_MS with their parameter types and
+# EXPLAIN QUERY PLAN, and flag requests running one statement shape more than N_PLUS_ONE_THRESHOLD times
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Slow queries are logged with the types of their parameters only; the values include password
+# hashes and email addresses, so logging them is a local debugging opt-in
+QUERY_LOG_PARAMETERS = os.getenv("QUERY_LOG_PARAMETERS", "false").lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# Distinct statement shapes kept in the aggregated stats
+QUERY_STATS_SIZE = int(os.getenv("QUERY_STATS_SIZE", "500"))
+
+# Access tokens; every token issuer and verifier goes through app.auth.tokens
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Verified token payloads kept per worker, each until its token expires (0 verifies every request)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# Cross-worker cache invalidation: writes append to the cache_invalidations table in their own
+# transaction and every worker applies new rows within INVALIDATION_POLL_INTERVAL seconds
+INVALIDATION_BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() in ("1", "true", "yes")
+INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.5"))
+# Seconds rows are kept; a worker that could not poll for longer drops its caches instead
+INVALIDATION_RETENTION = float(os.getenv("INVALIDATION_RETENTION", "3600"))
@@ -0,0 +1,228 @@
+import base64
+import json
+import re
+from typing import List, Optional
+
+from sqlalchemy import case, column, func, literal_column, or_, select, table, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.product import Product
+
+SORT_COLUMNS = {
+    "id": Product.id,
+    "price": Product.price,
+    "name": Product.name,
+}
+
+# JSON types a cursor may carry for each sort; anything else would reach the row-value comparison
+CURSOR_VALUE_TYPES = {
+    "price": (int, float),
+    "name": (str,),
+}
+
+
+def encode_cursor(sort: str, order: str, value, last_id: int) -> str:
+    raw = json.dumps([sort, order, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str):
+    """Return the (sort value, id) the previous page ended on."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(last_id, int):
+        raise ValueError("Cursor does not match the requested sort order")
+    expected = CURSOR_VALUE_TYPES.get(sort)
+    if expected and (isinstance(value, bool) or not isinstance(value, expected)):
+        raise ValueError("Malformed cursor")
+    return value, last_id
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# Columns schemas.Product is built from, for queries that skip the ORM entity
+PRODUCT_FIELDS = ("id", "name", "description", "image", "price")
+
+
+def products_page_query(
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    name_prefix: Optional[str] = None,
+    columns_only: bool = False,
+):
+    """Build a keyset-paginated SELECT over products.
+
+    Pages are ordered by (sort column, id) and continue strictly after the
+    row encoded in ``cursor``, so every page is an index range scan of at
+    most ``limit + 1`` rows no matter how deep the client is. The extra row
+    only tells ``build_products_page`` whether another page exists.
+    With ``columns_only`` the rows are plain PRODUCT_FIELDS tuples.
+    """
+    column = SORT_COLUMNS[sort]
+    keys = (Product.id,) if sort == "id" else (column, Product.id)
+    stmt = select(*(getattr(Product, field) for field in PRODUCT_FIELDS)) if columns_only else select(Product)
+
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    if name_prefix:
+        # A range instead of LIKE so SQLite can walk ix_products_name_id
+        stmt = stmt.where(Product.name >= name_prefix, Product.name < _prefix_upper_bound(name_prefix))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, order)
+        if sort == "id":
+            position, after = Product.id, last_id
+        else:
+            position, after = tuple_(column, Product.id), tuple_(value, last_id)
+        stmt = stmt.where(position > after if order == "asc" else position < after)
+
+    if order == "asc":
+        stmt = stmt.order_by(*keys)
+    else:
+        stmt = stmt.order_by(*(key.desc() for key in keys))
+    return stmt.limit(limit + 1)
+
+
+def build_products_page(products: List[Product], limit: int, sort: str = "id", order: str = "asc") -> dict:
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor(sort, order, getattr(last, sort), last.id)
+    return {"items": products, "next_cursor": next_cursor}
+
+
+products_fts = table("products_fts", column("rowid"))
+
+# BM25 column weights: a match in the name counts ten times one in the description
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+
+def fts_match_expression(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+
+    Only the last word is treated as still being typed; prefix terms merge
+    many doclists, so applying them everywhere makes broad queries slow.
+    Words are quoted, so user input can never be parsed as FTS5 syntax.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+
+def _fts_match(match: str):
+    return literal_column("products_fts").op("MATCH")(match)
+
+
+def search_window_query(match: str, max_candidates: int):
+    """Lowest rowid among the newest ``max_candidates`` matches.
+
+    FTS5 walks doclists in rowid order without scoring, so this is cheap
+    even for very common words; returns no row when there are fewer matches.
+    """
+    rowid = products_fts.c.rowid
+    return select(rowid).where(_fts_match(match)).order_by(rowid.desc()).limit(1).offset(max_candidates - 1)
+
+
+def products_search_query(match: str, limit: int, after=None, min_rowid: Optional[int] = None):
+    """Rank products matching ``match`` by BM25, one keyset page at a time.
+
+    Ranking, the keyset condition and the LIMIT all run inside the FTS5
+    query, so only the page's rows are joined back to products. ``after``
+    is the (score, id) the previous page ended on; ``min_rowid`` restricts
+    ranking to the candidate window. Selects (Product, score) rows.
+    """
+    rowid = products_fts.c.rowid
+    score = func.bm25(literal_column("products_fts"), *SEARCH_WEIGHTS)
+    ranked = score.label("score")
+    hits = select(rowid.label("id"), ranked).where(_fts_match(match))
+    if min_rowid is not None:
+        hits = hits.where(rowid >= min_rowid)
+    if after is not None:
+        hits = hits.where(tuple_(score, rowid) > tuple_(*after))
+    hits = hits.order_by(ranked, rowid).limit(limit + 1).subquery()
+    return select(Product, hits.c.score).join(hits, hits.c.id == Product.id).order_by(hits.c.score, hits.c.id)
+
+
+def search_products_page(db, match: str, limit: int, cursor: Optional[str] = None, max_candidates: int = 0) -> dict:
+    """One page of search results as ``{items, next_cursor}``.
+
+    BM25 has to score every candidate before the best can be picked, so
+    with ``max_candidates`` set only the newest that many matches are
+    ranked; the cost then stays flat however common the words are. The
+    window is fixed by the first page and carried in the cursor, which is
+    also tied to ``match`` so it cannot be replayed against another query.
+    Raises ValueError for a bad cursor.
+    """
+    after = min_rowid = None
+    if cursor:
+        value, last_id = decode_cursor(cursor, "rank", match)
+        if not (isinstance(value, list) and len(value) == 2):
+            raise ValueError("Malformed cursor")
+        score, min_rowid = value
+        if not isinstance(score, (int, float)) or not isinstance(min_rowid, (int, type(None))):
+            raise ValueError("Malformed cursor")
+        after = (score, last_id)
+    elif max_candidates > 0:
+        min_rowid = db.scalar(search_window_query(match, max_candidates))
+
+    rows = db.execute(products_search_query(match, limit, after, min_rowid)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, score = rows[-1]
+        next_cursor = encode_cursor("rank", match, [score, min_rowid], last.id)
+    return {"items": [product for product, _ in rows], "next_cursor": next_cursor}
+
+
+PRODUCT_EXPORT_FIELDS = PRODUCT_FIELDS
+
+
+def products_export_query():
+    return select(*(getattr(Product, field) for field in PRODUCT_EXPORT_FIELDS)).order_by(Product.id)
+
+
+PRODUCT_IMPORT_FIELDS = ("id", "name", "description", "price")
+
+
+def products_upsert_statement():
+    """INSERT ... ON CONFLICT(id) DO UPDATE for ``upsert_products``.
+
+    Rows without an id are inserted with a fresh one. An update keeps the
+    stored description when the row has none, and drops the cached Stripe
+    ids the same way ``invalidate_stripe_ids`` does when the name or price
+    changes. Images are not imported; they keep their reference counts and
+    are attached through ``PUT /products/{id}``.
+    """
+    products = Product.__table__
+    stmt = sqlite_insert(products)
+    excluded = stmt.excluded
+    name_changed = excluded.name != products.c.name
+    price_changed = excluded.price != products.c.price
+    return stmt.on_conflict_do_update(
+        index_elements=[products.c.id],
+        set_={
+            "name": excluded.name,
+            "description": func.coalesce(excluded.description, products.c.description),
+            "price": excluded.price,
+            "stripe_product_id": case((name_changed, None), else_=products.c.stripe_product_id),
+            "stripe_price_id": case((or_(name_changed, price_changed), None), else_=products.c.stripe_price_id),
+        },
+    )
+
+
+def upsert_products(db, rows: List[dict]):
+    """Upsert ``rows`` (dicts keyed by PRODUCT_IMPORT_FIELDS) in one executemany."""
+    db.execute(products_upsert_statement(), rows)
@@ -0,0 +1,32 @@
+from typing import List, Set
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.user import User
+
+USER_EXPORT_FIELDS = ("id", "first_name", "last_name", "email", "user_type")
+# schemas.UserOut has the same fields
+USER_LIST_FIELDS = USER_EXPORT_FIELDS
+
+
+def users_list_query():
+    return select(*(getattr(User, field) for field in USER_LIST_FIELDS))
+
+
+def users_export_query():
+    return select(*(getattr(User, field) for field in USER_EXPORT_FIELDS)).order_by(User.id)
+
+
+def existing_emails(db, emails: List[str]) -> Set[str]:
+    return set(db.scalars(select(User.email).where(User.email.in_(emails))))
+
+
+def insert_users(db, rows: List[dict]) -> Set[str]:
+    """Insert ``rows`` in one executemany, skipping emails that already exist.
+
+    Returns the emails that were actually inserted.
+    """
+    users = User.__table__
+    stmt = sqlite_insert(users).on_conflict_do_nothing(index_elements=[users.c.email]).returning(users.c.email)
+    return set(db.execute(stmt, rows).scalars())
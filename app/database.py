@@ -1,16 +1,116 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./users.db"
+from app.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_READ_POOL_SIZE,
+    QUERY_LOG_ENABLED,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KIB,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+from app.utils.query_log import instrument_queries
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+ASYNC_SQLALCHEMY_DATABASE_URL = ASYNC_DATABASE_URL
+
+
+def sqlite_pragmas(read_only: bool = False) -> dict:
+    """Pragmas run on every new SQLite connection, in order."""
+    pragmas = {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -SQLITE_CACHE_SIZE_KIB,
+        "mmap_size": SQLITE_MMAP_SIZE,
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def _apply_pragmas(pragmas: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+
+def _engine_options(url: str, pool_size: int) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a single-connection pool that takes no sizing
+        return {}
+    return {"pool_size": pool_size, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+
+def make_engine(url: str = DATABASE_URL, read_only: bool = False, pool_size: int = DB_POOL_SIZE):
+    """Sync engine with the configured pool and, for SQLite, the connection pragmas."""
+    connect_args = {"check_same_thread": False} if make_url(url).get_backend_name() == "sqlite" else {}
+    engine = create_engine(url, connect_args=connect_args, **_engine_options(url, pool_size))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_pragmas(sqlite_pragmas(read_only)))
+    return engine
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, read_only: bool = False, pool_size: int = DB_POOL_SIZE):
+    """Async counterpart of make_engine; pragmas are hooked on the wrapped sync engine."""
+    engine = create_async_engine(url, **_engine_options(url, pool_size))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _apply_pragmas(sqlite_pragmas(read_only)))
+    return engine
+
+
+engine = make_engine()
 sessionlocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# GET routes read through their own pool of query_only connections, so they never queue
+# behind write sessions for a connection and cannot write by accident
+read_engine = make_engine(read_only=True, pool_size=DB_READ_POOL_SIZE)
+read_sessionlocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = make_async_engine()
+async_sessionlocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async_read_engine = make_async_engine(ASYNC_DATABASE_URL, read_only=True, pool_size=DB_READ_POOL_SIZE)
+async_read_sessionlocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Opt-in slow-query log and per-shape statistics (see app.utils.query_log)
+if QUERY_LOG_ENABLED:
+    for _engine in (engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine):
+        instrument_queries(_engine)
+
 def get_db():
     db = sessionlocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = read_sessionlocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with async_sessionlocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with async_read_sessionlocal() as db:
+        yield db
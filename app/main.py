@@ -1,28 +1,92 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import user as user_router
-from app.routers import product as product_router  
+from app import database
+from app.config import METRICS_ENABLED, QUERY_LOG_ENABLED, USE_ASYNC_DB
 from app.routers import stripe_webhook as stripe_router
+from app.utils.invalidation import invalidation_bus
+from app.utils.job_queue import job_worker
+from app.utils.metrics import MetricsMiddleware, instrument_engine, request_metrics, stats_collector
+from app.utils.query_log import QueryLogMiddleware
+from app.utils.uploads import ensure_upload_dir
 from fastapi.openapi.utils import get_openapi
 
-app = FastAPI()
 
-# Enable CORS (important for Swagger & frontend requests)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Filesystem side effects belong to a starting server, not to importing the app
+    ensure_upload_dir()
+    job_worker.start()
+    invalidation_bus.start()
+    yield
+    invalidation_bus.stop()
+    job_worker.stop()
+
+
+def create_app() -> FastAPI:
+    """Build the API; serve it with ``uvicorn --factory app.main:create_app`` or the module-level ``app``.
+
+    Stripe, the SendGrid HTTP client and xhtml2pdf are imported on first use,
+    so building the app does not pay for them.
+    """
+    app = FastAPI(lifespan=lifespan)
+
+    # Enable CORS (important for Swagger & frontend requests)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Engines are instrumented in app.database; this adds the per-request N+1 check
+    if QUERY_LOG_ENABLED:
+        app.add_middleware(QueryLogMiddleware)
+
+    # Outermost, so latency covers every other middleware
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        for engine in (database.engine, database.read_engine, database.async_engine.sync_engine, database.async_read_engine.sync_engine):
+            instrument_engine(engine)
+
+    # Routers
+    if USE_ASYNC_DB:
+        from app.routers import user_async as user_router
+        from app.routers import product_async as product_router
+    else:
+        from app.routers import user as user_router
+        from app.routers import product as product_router
+
+    app.include_router(user_router.router)
+    app.include_router(product_router.router)
+    app.include_router(stripe_router.router)
+
+    if METRICS_ENABLED:
+        from app.auth.cache import principal_cache
+        from app.auth.tokens import token_service
+        from app.routers import metrics as metrics_router
+        from app.utils.stripe import price_cache
+        from app.utils.webhook_events import processed_events
+
+        app.include_router(metrics_router.router)
+        request_metrics.register_collector("principal_cache", stats_collector(
+            "principal_cache", principal_cache.stats, ("hits", "misses", "invalidations"), "Principal cache"))
+        request_metrics.register_collector("token_cache", stats_collector(
+            "token_cache", token_service.stats, ("hits", "misses"), "Verified access token cache"))
+        request_metrics.register_collector("stripe_price_cache", stats_collector(
+            "stripe_price_cache", price_cache.stats, ("hits", "misses"), "Stripe price id reuse at checkout"))
+        request_metrics.register_collector("invalidation_bus", stats_collector(
+            "invalidation_bus", invalidation_bus.stats, ("published", "received", "resyncs"), "Cross-worker cache invalidations"))
+        request_metrics.register_collector("webhook_events", stats_collector(
+            "webhook_events", processed_events.stats, ("duplicates_suppressed", "pruned"), "Stripe webhook deduplication"))
+
+    app.openapi = lambda: custom_openapi(app)
+    return app
 
-# Routers
-app.include_router(user_router.router)
-app.include_router(product_router.router)
-app.include_router(stripe_router.router)
 
 # JWT Bearer auth setup for docs
-def custom_openapi():
+def custom_openapi(app: FastAPI):
     if app.openapi_schema:
         return app.openapi_schema
     openapi_schema = get_openapi(
@@ -44,4 +108,5 @@ def custom_openapi():
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
-app.openapi = custom_openapi
+
+app = create_app()
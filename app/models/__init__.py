@@ -1,2 +1,6 @@
+from .cache_invalidation import CacheInvalidation
+from .job import DeadLetterJob, Job
+from .processed_event import ProcessedEvent
 from .product import Product
-from .user import User
+from .stored_image import StoredImage
+from .user import User
\ No newline at end of file
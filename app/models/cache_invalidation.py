@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Float, Integer, String
+from app.database import Base
+
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+
+    # AUTOINCREMENT so pruned ids are never handed out again: workers read "everything after id N"
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    key = Column(String)
+    created_at = Column(Float, nullable=False, index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Float, Index, Integer, String, Text
+from app.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(Float, nullable=False)
+    locked_at = Column(Float)
+    last_error = Column(Text)
+    created_at = Column(Float, nullable=False)
+
+    # Workers claim the oldest runnable pending job
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+class DeadLetterJob(Base):
+    __tablename__ = "dead_letter_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text)
+    failed_at = Column(Float, nullable=False)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Float, Integer, String
+from app.database import Base
+
+class ProcessedEvent(Base):
+    __tablename__ = "processed_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, index=True, nullable=False)
+    event_type = Column(String, nullable=False)
+    processed_at = Column(Float, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import DDL, Column, Integer, String, Float, Index, event
 from app.database import Base
 
 class Product(Base):
@@ -9,3 +9,39 @@ class Product(Base):
     description = Column(String)
     image = Column(String)  
     price = Column(Float, nullable=False)
+    # Filled on first checkout; cleared when the name or price changes
+    stripe_product_id = Column(String)
+    stripe_price_id = Column(String)
+
+    # Keyset pagination walks (sort column, id) ranges
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+    )
+
+
+# Full-text index over name/description. External content: products_fts only
+# stores the inverted index and reads the text back from products, while the
+# triggers keep it in sync with every insert, update and delete. The Alembic
+# migration creates the same objects for existing databases.
+PRODUCTS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+)
+
+for statement in PRODUCTS_FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.utils.metrics import request_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Prometheus scrape target
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(request_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
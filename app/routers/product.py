@@ -1,35 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import stripe
-import os
-from uuid import uuid4
+from typing import Annotated, Optional
 
 from app import models, schemas
-from app.database import get_db
+from app.crud.product import (
+    PRODUCT_EXPORT_FIELDS,
+    build_products_page,
+    fts_match_expression,
+    products_export_query,
+    products_page_query,
+    search_products_page,
+)
+from app.database import get_db, get_read_db
 from app.auth.deps import get_current_user, is_admin_user
 from app.models.user import User
 from app.models.product import Product as DBProduct
-from app.config import STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET
-from app.utils.email_utils import send_invoice_email
+from app.config import FAST_JSON, IMPORT_BATCH_SIZE, SEARCH_MAX_CANDIDATES
+from app.utils.catalog import not_modified
+from app.utils.export import MEDIA_TYPES, ExportFormat, export_headers, stream_rows
+from app.utils.fastjson import json_response, product_row
+from app.utils.images import schedule_variants
+from app.utils.imports import guess_format, import_products
+from app.utils.invalidation import invalidation_bus
+from app.utils.stripe import create_checkout_session, ensure_stripe_price, invalidate_stripe_ids, price_cache
+from app.utils.uploads import release_upload, stage_upload_sync, store_upload
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
-stripe.api_key = STRIPE_SECRET_KEY
-
-# Upload dir
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPLOAD_DIR = os.path.join(os.path.dirname(BASE_DIR), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-# Get all products
-@router.get("/", response_model=List[schemas.Product])
-def get_products(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(models.Product).all()
+# List products, one keyset page at a time
+@router.get("/", response_model=schemas.ProductPage)
+def get_products(
+    request: Request,
+    response: Response,
+    params: Annotated[schemas.ProductListQuery, Query()],
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
+    try:
+        stmt = products_page_query(**params.model_dump(), columns_only=FAST_JSON)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if FAST_JSON:
+        rows = db.execute(stmt).all()
+        page = build_products_page(rows, params.limit, params.sort, params.order)
+        page["items"] = [product_row(row) for row in page["items"]]
+        return json_response(page, response)
+    products = db.scalars(stmt).all()
+    return build_products_page(products, params.limit, params.sort, params.order)
+
+# Full-text search over name/description, best matches first (declared before /{product_id})
+@router.get("/search", response_model=schemas.ProductPage)
+def search_products(
+    request: Request,
+    response: Response,
+    params: Annotated[schemas.ProductSearchQuery, Query()],
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
+    match = fts_match_expression(params.q)
+    if match is None:
+        return {"items": [], "next_cursor": None}
+    try:
+        return search_products_page(db, match, params.limit, params.cursor, SEARCH_MAX_CANDIDATES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Stream the whole catalog as NDJSON/CSV (declared before /{product_id})
+@router.get("/export")
+def export_products(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(is_admin_user)
+):
+    return StreamingResponse(
+        stream_rows(db, products_export_query(), PRODUCT_EXPORT_FIELDS, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("products", fmt),
+    )
 
 # Get single product
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_product(product_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -45,13 +106,7 @@ def create_product(
     db: Session = Depends(get_db),
     current_user: User = Depends(is_admin_user)
 ):
-    ext = os.path.splitext(image.filename)[1]
-    filename = f"{uuid4().hex}{ext}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
-    with open(filepath, "wb") as f:
-        f.write(image.file.read())
-
-    image_url = f"/uploads/{filename}"
+    image_url = store_upload(db, stage_upload_sync(image))
 
     db_product = models.Product(
         name=name,
@@ -60,10 +115,23 @@ def create_product(
         image=image_url
     )
     db.add(db_product)
+    invalidation_bus.publish(db, "catalog")
     db.commit()
     db.refresh(db_product)
+    schedule_variants(image_url)
     return db_product
 
+# Bulk upsert from a CSV/NDJSON upload, validated and written batch by batch
+@router.post("/import", response_model=schemas.ProductImportReport)
+def import_products_file(
+    file: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(is_admin_user)
+):
+    return import_products(db, file.file, fmt or guess_format(file.filename, file.content_type), batch_size)
+
 # Update product (optional new image)
 @router.put("/{product_id}", response_model=schemas.Product)
 def update_product(
@@ -79,6 +147,7 @@ def update_product(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    invalidate_stripe_ids(product, name=name, price=price)
     if name:
         product.name = name
     if description:
@@ -86,15 +155,15 @@ def update_product(
     if price:
         product.price = price
     if image:
-        ext = os.path.splitext(image.filename)[1]
-        filename = f"{uuid4().hex}{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        with open(filepath, "wb") as f:
-            f.write(image.file.read())
-        product.image = f"/uploads/{filename}"
+        image_url = store_upload(db, stage_upload_sync(image))
+        release_upload(db, product.image)
+        product.image = image_url
 
+    invalidation_bus.publish(db, "catalog")
     db.commit()
     db.refresh(product)
+    if image:
+        schedule_variants(product.image)
     return product
 
 # Delete product
@@ -103,7 +172,9 @@ def delete_product(product_id: int, db: Session = Depends(get_db), current_user:
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    release_upload(db, product.image)
     db.delete(product)
+    invalidation_bus.publish(db, "catalog")
     db.commit()
     return {"message": "Product deleted successfully"}
 
@@ -114,44 +185,12 @@ def checkout_session(product_id: int, db: Session = Depends(get_db), current_use
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     try:
-        checkout_session = stripe.checkout.Session.create(
-            customer_email=current_user.email,
-            line_items=[{
-                'price_data': {
-                    'currency': 'usd',
-                    'product_data': {
-                        'name': product.name,
-                        'description': product.description,
-                    },
-                    'unit_amount': int(product.price * 100),
-                },
-                'quantity': 1,
-            }],
-            mode='payment',
-            success_url="http://localhost:8000/docs",
-            cancel_url="http://localhost:8000/docs",
-        )
-        return {"checkout_url": checkout_session.url}
+        price_id = ensure_stripe_price(db, product)
+        return {"checkout_url": create_checkout_session(price_id, customer_email=current_user.email)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Stripe Webhook
-@router.post("/webhook")
-async def stripe_webhook(request):
-    payload = await request.body()
-    sig_header = request.headers.get("stripe-signature")
-    try:
-        event = stripe.Webhook.construct_event(payload, sig_header, STRIPE_WEBHOOK_SECRET)
-    except stripe.error.SignatureVerificationError:
-        raise HTTPException(status_code=400, detail="Invalid signature")
-
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        customer_email = session.get("customer_email", "test@example.com")
-        html_content = f"""
-        <h3>Thank you for your payment!</h3>
-        <p>Session ID: {session['id']}</p>
-        <p>Amount Paid: {session['amount_total'] / 100} USD</p>
-        """
-        send_invoice_email(customer_email, "Invoice - Payment Successful", html_content)
-    return {"status": "success"}
+
+@router.get("/cache/stripe-prices", response_model=dict, dependencies=[Depends(is_admin_user)])
+def stripe_price_cache_stats():
+    return price_cache.stats()
@@ -0,0 +1,207 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional
+
+from app import models, schemas
+from app.crud.product import (
+    PRODUCT_EXPORT_FIELDS,
+    build_products_page,
+    fts_match_expression,
+    products_export_query,
+    products_page_query,
+    search_products_page,
+)
+from app.database import get_async_db, get_async_read_db
+from app.auth.deps import get_current_user_async, is_admin_user_async
+from app.config import FAST_JSON, IMPORT_BATCH_SIZE, SEARCH_MAX_CANDIDATES
+from app.models.user import User
+from app.utils.catalog import not_modified
+from app.utils.export import MEDIA_TYPES, ExportFormat, export_headers, stream_rows_async
+from app.utils.fastjson import json_response, product_row
+from app.utils.images import schedule_variants
+from app.utils.imports import guess_format, import_products_async
+from app.utils.invalidation import invalidation_bus
+from app.utils.stripe import (
+    cached_price_id,
+    create_checkout_session,
+    invalidate_stripe_ids,
+    price_cache,
+    store_stripe_ids,
+    sync_stripe_price,
+)
+from app.utils.uploads import release_upload, stage_upload, store_upload
+
+# Async counterpart of app.routers.product, mounted instead of it when USE_ASYNC_DB is set
+router = APIRouter(prefix="/products", tags=["Products"])
+
+
+async def _get_product_or_404(db: AsyncSession, product_id: int):
+    product = await db.get(models.Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
+# List products, one keyset page at a time
+@router.get("/", response_model=schemas.ProductPage)
+async def get_products(
+    request: Request,
+    response: Response,
+    params: Annotated[schemas.ProductListQuery, Query()],
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
+    try:
+        stmt = products_page_query(**params.model_dump(), columns_only=FAST_JSON)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if FAST_JSON:
+        rows = (await db.execute(stmt)).all()
+        page = build_products_page(rows, params.limit, params.sort, params.order)
+        page["items"] = [product_row(row) for row in page["items"]]
+        return json_response(page, response)
+    products = (await db.scalars(stmt)).all()
+    return build_products_page(products, params.limit, params.sort, params.order)
+
+# Full-text search over name/description, best matches first (declared before /{product_id})
+@router.get("/search", response_model=schemas.ProductPage)
+async def search_products(
+    request: Request,
+    response: Response,
+    params: Annotated[schemas.ProductSearchQuery, Query()],
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
+    match = fts_match_expression(params.q)
+    if match is None:
+        return {"items": [], "next_cursor": None}
+    try:
+        return await db.run_sync(search_products_page, match, params.limit, params.cursor, SEARCH_MAX_CANDIDATES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Stream the whole catalog as NDJSON/CSV (declared before /{product_id})
+@router.get("/export")
+async def export_products(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(is_admin_user_async)
+):
+    return StreamingResponse(
+        stream_rows_async(db, products_export_query(), PRODUCT_EXPORT_FIELDS, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("products", fmt),
+    )
+
+# Get single product
+@router.get("/{product_id}", response_model=schemas.Product)
+async def get_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_current_user_async)):
+    unchanged = not_modified(request, response)
+    if unchanged:
+        return unchanged
+    return await _get_product_or_404(db, product_id)
+
+# Create product with image upload
+@router.post("/", response_model=schemas.Product)
+async def create_product(
+    name: str = Form(...),
+    description: Optional[str] = Form(None),
+    price: float = Form(...),
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(is_admin_user_async)
+):
+    db_product = models.Product(
+        name=name,
+        description=description,
+        price=price,
+        image=await db.run_sync(store_upload, await stage_upload(image))
+    )
+    db.add(db_product)
+    invalidation_bus.publish(db, "catalog")
+    await db.commit()
+    await db.refresh(db_product)
+    schedule_variants(db_product.image)
+    return db_product
+
+# Bulk upsert from a CSV/NDJSON upload, validated and written batch by batch
+@router.post("/import", response_model=schemas.ProductImportReport)
+async def import_products_file(
+    file: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(is_admin_user_async)
+):
+    return await import_products_async(db, file.file, fmt or guess_format(file.filename, file.content_type), batch_size)
+
+# Update product (optional new image)
+@router.put("/{product_id}", response_model=schemas.Product)
+async def update_product(
+    product_id: int,
+    name: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    price: Optional[float] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(is_admin_user_async)
+):
+    product = await _get_product_or_404(db, product_id)
+
+    invalidate_stripe_ids(product, name=name, price=price)
+    if name:
+        product.name = name
+    if description:
+        product.description = description
+    if price:
+        product.price = price
+    if image:
+        image_url = await db.run_sync(store_upload, await stage_upload(image))
+        await db.run_sync(release_upload, product.image)
+        product.image = image_url
+
+    invalidation_bus.publish(db, "catalog")
+    await db.commit()
+    await db.refresh(product)
+    if image:
+        schedule_variants(product.image)
+    return product
+
+# Delete product
+@router.delete("/{product_id}")
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(is_admin_user_async)):
+    product = await _get_product_or_404(db, product_id)
+    await db.run_sync(release_upload, product.image)
+    await db.delete(product)
+    invalidation_bus.publish(db, "catalog")
+    await db.commit()
+    return {"message": "Product deleted successfully"}
+
+# Stripe Checkout Session
+@router.post("/checkout-session/{product_id}")
+async def checkout_session(product_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
+    product = await _get_product_or_404(db, product_id)
+    try:
+        price_id = cached_price_id(product)
+        if price_id is None:
+            # Stripe calls stay off the event loop; only the commit is awaited
+            stripe_product_id, price_id = await run_in_threadpool(sync_stripe_price, product)
+            await db.execute(store_stripe_ids(product, stripe_product_id, price_id))
+            await db.commit()
+        checkout_url = await run_in_threadpool(create_checkout_session, price_id, current_user.email)
+        return {"checkout_url": checkout_url}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/stripe-prices", response_model=dict, dependencies=[Depends(is_admin_user_async)])
+async def stripe_price_cache_stats():
+    return price_cache.stats()
@@ -1,20 +1,23 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.config import STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET
+from app.config import STRIPE_WEBHOOK_SECRET
 from app.models.product import Product as DBProduct
-import stripe
-from app.utils.email_utils import send_invoice_email
-from app.utils.pdf_generator import generate_invoice_pdf
-import os
+from app.utils.invoices import CHECKOUT_COMPLETED_JOB, checkout_job_payload
+from app.utils.job_queue import enqueue, job_worker
+from app.utils.stripe import create_checkout_session, ensure_stripe_price, get_stripe
+from app.utils.webhook_events import processed_events
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/products",
     tags=["Stripe Webhook"]
 )
 
-stripe.api_key = STRIPE_SECRET_KEY
-
 
 @router.post("/checkout-session/{product_id}")
 def checkout_session(product_id: int, db: Session = Depends(get_db)):
@@ -24,34 +27,28 @@ def checkout_session(product_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     
     try:
-        checkout_session = stripe.checkout.Session.create(
-            line_items=[
-                {
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': product.name,
-                            'description': product.description,
-                        },
-                        'unit_amount': int(product.price * 100),
-                    },
-                    'quantity': 1,
-                },
-            ],
-            mode='payment',
-            success_url="http://localhost:8000/docs",
-            cancel_url="http://localhost:8000/docs",
-        )
-        return {"checkout_url": checkout_session.url}
+        price_id = ensure_stripe_price(db, product)
+        return {"checkout_url": create_checkout_session(price_id)}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _record_event(db: Session, event) -> bool:
+    if event["type"] == "checkout.session.completed":
+        enqueue(db, CHECKOUT_COMPLETED_JOB, checkout_job_payload(event["data"]["object"]))
+    return processed_events.commit_once(db, event["id"], event["type"])
+
+
+# Only verifies and records the event: the invoice PDF and email are produced
+# by the job workers, so Stripe gets its 200 within milliseconds. Stripe
+# delivers at least once; a redelivered event is acknowledged without
+# queueing its work again.
 @router.post("/webhook")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
+    stripe = get_stripe()
 
     try:
         event = stripe.Webhook.construct_event(
@@ -60,38 +57,13 @@ async def stripe_webhook(request: Request):
     except stripe.error.SignatureVerificationError:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        print("Payment successful for session:", session["id"])
-        
-        try:
-            amount_paid = session.get("amount_total", 0) / 100
-            customer_email = session.get("customer_details", {}).get("email")
-            print("Customer email:", customer_email)
-            print("Amount paid:", amount_paid)
-
-            # PDF Generate with debug logs
-            print("Starting PDF generation...")
-            pdf_path = generate_invoice_pdf(session["id"], amount_paid)
-            print(f"PDF path returned: {pdf_path}")
+    if processed_events.seen_recently(event["id"]):
+        return {"status": "duplicate"}
+    if not await run_in_threadpool(_record_event, db, event):
+        return {"status": "duplicate"}
 
-            if pdf_path and os.path.exists(pdf_path):
-                print("PDF file exists and is ready to attach.")
-            else:
-                print("PDF file does NOT exist or path is empty.")
-
-            # Email send
-            send_invoice_email(
-                to_email=customer_email or "test@example.com",
-                subject="Invoice - Payment Successful",
-                html_content=f"""
-                    <h3>Thank you for your payment!</h3>
-                    <p>Session ID: {session['id']}</p>
-                    <p>Amount Paid: {amount_paid} USD</p>
-                """,
-                pdf_path=pdf_path
-            )
-        except Exception as e:
-            print("ERROR inside webhook logic:", e)
+    if event["type"] == "checkout.session.completed":
+        logger.info("Payment successful for session %s", event["data"]["object"]["id"])
+        job_worker.notify()
 
     return {"status": "success"}
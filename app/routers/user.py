@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from passlib.hash import bcrypt
 from fastapi.security import OAuth2PasswordBearer
-from app.database import get_db
+from app.crud.user import USER_EXPORT_FIELDS, USER_LIST_FIELDS, users_export_query, users_list_query
+from app.database import get_db, get_read_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserOut, UserLogin, Token
-from app.utils.jwt import create_access_token, verify_token
+from app.schemas.user import UserCreate, UserImportReport, UserOut, UserLogin, Token
+from app.auth.tokens import create_access_token, token_service
+from app.auth.cache import principal_cache
 from app.auth.deps import allow_admin
+from app.auth.hashing import hash_password, verify_and_update_password
+from app.config import FAST_JSON, IMPORT_BATCH_SIZE, QUERY_LOG_ENABLED
+from app.utils.export import MEDIA_TYPES, ExportFormat, export_headers, stream_rows
+from app.utils.fastjson import json_response, rows_as_dicts
+from app.utils.imports import guess_format, import_users
+from app.utils.invalidation import invalidation_bus
+from app.utils.query_log import query_stats
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="user/login")
@@ -14,7 +23,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="user/login")
 
 @router.post("/", response_model=UserOut, dependencies=[Depends(allow_admin)])
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    hashed_password = bcrypt.hash(user.password)
+    hashed_password = hash_password(user.password)
     db_user = User(
         first_name=user.first_name,
         last_name=user.last_name,
@@ -28,17 +37,42 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 
+# Provision many accounts from a CSV/NDJSON upload; passwords are hashed
+# across the whole hashing pool and existing emails are reported, not fatal
+@router.post("/bulk", response_model=UserImportReport, dependencies=[Depends(allow_admin)])
+def bulk_create_users(
+    file: UploadFile = File(...),
+    fmt: ExportFormat | None = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    return import_users(db, file.file, fmt or guess_format(file.filename, file.content_type), batch_size)
+
+
 @router.get("/", response_model=list[UserOut], dependencies=[Depends(allow_admin)])
-def get_users(db: Session = Depends(get_db)):
+def get_users(db: Session = Depends(get_read_db)):
+    if FAST_JSON:
+        return json_response(rows_as_dicts(USER_LIST_FIELDS, db.execute(users_list_query())))
     return db.query(User).all()
 
 
+@router.get("/export/users", dependencies=[Depends(allow_admin)])
+def export_users(fmt: ExportFormat = Query("ndjson", alias="format"), db: Session = Depends(get_read_db)):
+    return StreamingResponse(
+        stream_rows(db, users_export_query(), USER_EXPORT_FIELDS, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("users", fmt),
+    )
+
+
 @router.delete("/{user_id}", dependencies=[Depends(allow_admin)])
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    email = user.email
     db.delete(user)
+    invalidation_bus.publish(db, "principal", email)
     db.commit()
     return {"detail": "User deleted successfully"}
 
@@ -48,22 +82,49 @@ def update_user(user_id: int, updated_data: UserCreate, db: Session = Depends(ge
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    previous_email = user.email
     user.first_name = updated_data.first_name
     user.last_name = updated_data.last_name
     user.email = updated_data.email
-    user.password = bcrypt.hash(updated_data.password)
+    user.password = hash_password(updated_data.password)
+    invalidation_bus.publish(db, "principal", previous_email, updated_data.email)
     db.commit()
     db.refresh(user)
     return user
 
 
+@router.get("/cache/principals", response_model=dict, dependencies=[Depends(allow_admin)])
+def principal_cache_stats():
+    return principal_cache.stats()
+
+
+@router.get("/cache/tokens", response_model=dict, dependencies=[Depends(allow_admin)])
+def token_cache_stats():
+    return token_service.stats()
+
+
+# Slowest statement shapes and recent N+1 findings (collected when QUERY_LOG_ENABLED is set)
+@router.get("/stats/queries", response_model=dict, dependencies=[Depends(allow_admin)])
+def query_stats_report(limit: int = Query(20, ge=1, le=500)):
+    return {"enabled": QUERY_LOG_ENABLED, **query_stats.stats(limit)}
+
+
+@router.delete("/stats/queries", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(allow_admin)])
+def reset_query_stats():
+    query_stats.clear()
+
+
 @router.post("/login", response_model=Token)
 def login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.email == user.email).first()
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid email")
-    if not bcrypt.verify(user.password, db_user.password):
+    valid, new_hash = verify_and_update_password(user.password, db_user.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect password")
+    if new_hash:
+        db_user.password = new_hash
+        db.commit()
     access_token = create_access_token({
         "sub": db_user.email,
         "user_id": db_user.id,
@@ -77,7 +138,7 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/check-role", response_model=dict, dependencies=[Depends(allow_admin)])
-def check_user_role(email: str, db: Session = Depends(get_db)):
+def check_user_role(email: str, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.email == email).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
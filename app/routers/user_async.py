@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.user import USER_EXPORT_FIELDS, USER_LIST_FIELDS, users_export_query, users_list_query
+from app.database import get_async_db, get_async_read_db
+from app.models.user import User
+from app.schemas.user import UserCreate, UserImportReport, UserOut, UserLogin, Token
+from app.auth.tokens import create_access_token, token_service
+from app.auth.cache import principal_cache
+from app.auth.deps import allow_admin_async
+from app.auth.hashing import hash_password_async, verify_and_update_password_async
+from app.config import FAST_JSON, IMPORT_BATCH_SIZE, QUERY_LOG_ENABLED
+from app.utils.export import MEDIA_TYPES, ExportFormat, export_headers, stream_rows_async
+from app.utils.fastjson import json_response, rows_as_dicts
+from app.utils.imports import guess_format, import_users_async
+from app.utils.invalidation import invalidation_bus
+from app.utils.query_log import query_stats
+
+# Async counterpart of app.routers.user, mounted instead of it when USE_ASYNC_DB is set
+router = APIRouter()
+
+
+async def _get_user_by(db: AsyncSession, *criteria):
+    result = await db.execute(select(User).where(*criteria))
+    return result.scalars().first()
+
+
+@router.post("/", response_model=UserOut, dependencies=[Depends(allow_admin_async)])
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    hashed_password = await hash_password_async(user.password)
+    db_user = User(
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
+        password=hashed_password,
+        user_type=user.user_type
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+@router.post("/bulk", response_model=UserImportReport, dependencies=[Depends(allow_admin_async)])
+async def bulk_create_users(
+    file: UploadFile = File(...),
+    fmt: ExportFormat | None = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await import_users_async(db, file.file, fmt or guess_format(file.filename, file.content_type), batch_size)
+
+
+@router.get("/", response_model=list[UserOut], dependencies=[Depends(allow_admin_async)])
+async def get_users(db: AsyncSession = Depends(get_async_read_db)):
+    if FAST_JSON:
+        return json_response(rows_as_dicts(USER_LIST_FIELDS, await db.execute(users_list_query())))
+    result = await db.execute(select(User))
+    return result.scalars().all()
+
+
+@router.get("/export/users", dependencies=[Depends(allow_admin_async)])
+async def export_users(fmt: ExportFormat = Query("ndjson", alias="format"), db: AsyncSession = Depends(get_async_read_db)):
+    return StreamingResponse(
+        stream_rows_async(db, users_export_query(), USER_EXPORT_FIELDS, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("users", fmt),
+    )
+
+
+@router.delete("/{user_id}", dependencies=[Depends(allow_admin_async)])
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await _get_user_by(db, User.id == user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    email = user.email
+    await db.delete(user)
+    invalidation_bus.publish(db, "principal", email)
+    await db.commit()
+    return {"detail": "User deleted successfully"}
+
+
+@router.put("/{user_id}", response_model=UserOut, dependencies=[Depends(allow_admin_async)])
+async def update_user(user_id: int, updated_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    user = await _get_user_by(db, User.id == user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    previous_email = user.email
+    user.first_name = updated_data.first_name
+    user.last_name = updated_data.last_name
+    user.email = updated_data.email
+    user.password = await hash_password_async(updated_data.password)
+    invalidation_bus.publish(db, "principal", previous_email, updated_data.email)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+@router.get("/cache/principals", response_model=dict, dependencies=[Depends(allow_admin_async)])
+async def principal_cache_stats():
+    return principal_cache.stats()
+
+
+@router.get("/cache/tokens", response_model=dict, dependencies=[Depends(allow_admin_async)])
+async def token_cache_stats():
+    return token_service.stats()
+
+
+# Slowest statement shapes and recent N+1 findings (collected when QUERY_LOG_ENABLED is set)
+@router.get("/stats/queries", response_model=dict, dependencies=[Depends(allow_admin_async)])
+async def query_stats_report(limit: int = Query(20, ge=1, le=500)):
+    return {"enabled": QUERY_LOG_ENABLED, **query_stats.stats(limit)}
+
+
+@router.delete("/stats/queries", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(allow_admin_async)])
+async def reset_query_stats():
+    query_stats.clear()
+
+
+@router.post("/login", response_model=Token)
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await _get_user_by(db, User.email == user.email)
+    if not db_user:
+        raise HTTPException(status_code=400, detail="Invalid email")
+    valid, new_hash = await verify_and_update_password_async(user.password, db_user.password)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Incorrect password")
+    if new_hash:
+        db_user.password = new_hash
+        await db.commit()
+    access_token = create_access_token({
+        "sub": db_user.email,
+        "user_id": db_user.id,
+        "user_type": db_user.user_type
+    })
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user_type": db_user.user_type
+    }
+
+
+@router.get("/check-role", response_model=dict, dependencies=[Depends(allow_admin_async)])
+async def check_user_role(email: str, db: AsyncSession = Depends(get_async_read_db)):
+    user = await _get_user_by(db, User.email == email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"email": user.email, "user_type": user.user_type}
@@ -1 +1 @@
-from .product import ProductOut, ProductCreate, ProductUpdate, Product
+from .product import ProductOut, ProductCreate, ProductUpdate, Product, ProductListQuery, ProductPage, ProductSearchQuery, ProductImportRow, ProductImportReport
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import Dict, List, Literal, Optional
+
+from app.utils.images import variant_urls
 
 class ProductBase(BaseModel):
     name: str
@@ -21,5 +23,47 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def variants(self) -> Dict[str, str]:
+        """Resized WebP derivatives of ``image``, keyed by variant name; empty until all are rendered."""
+        return variant_urls(self.image)
+
 class ProductOut(Product):
     pass
+
+class ProductListQuery(BaseModel):
+    limit: int = Field(50, ge=1, le=200)
+    cursor: Optional[str] = None
+    sort: Literal["id", "price", "name"] = "id"
+    order: Literal["asc", "desc"] = "asc"
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    name_prefix: Optional[str] = None
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+class ProductSearchQuery(BaseModel):
+    q: str = Field(..., min_length=1, max_length=200)
+    limit: int = Field(20, ge=1, le=200)
+    cursor: Optional[str] = None
+
+class ProductImportRow(BaseModel):
+    """One CSV/NDJSON import row; rows with an existing ``id`` update that product."""
+    id: Optional[int] = Field(None, ge=1)
+    name: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    price: float = Field(..., ge=0)
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.product import ImportRowError
 
 
 # User Schemas
@@ -26,6 +28,21 @@ class UserOut(BaseModel):
         from_attributes = True
 
 
+class DuplicateUser(BaseModel):
+    line: int
+    email: str
+
+
+class UserImportReport(BaseModel):
+    received: int
+    created: int
+    duplicates: int
+    failed: int
+    duplicate_rows: List[DuplicateUser]
+    errors: List[ImportRowError]
+    errors_truncated: bool
+
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -0,0 +1,75 @@
+import secrets
+import threading
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.config import CATALOG_CACHE_CONTROL
+from app.utils.invalidation import invalidation_bus
+
+
+class CatalogVersion:
+    """Version of the product catalog, used as the ETag of catalog reads.
+
+    Product writes publish a "catalog" change on the invalidation bus, and
+    the version follows the id of the latest one, so every worker that has
+    applied the same changes serves the same ETag. With the bus disabled it
+    is a per-process counter behind a random epoch that changes on every
+    start, so a restarted process can never hand out an ETag that meant
+    different data before.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+
+    def advance(self, key: Optional[str], change_id: Optional[int]):
+        """Invalidation bus handler; change ids come from the shared change log."""
+        if change_id is None:
+            self.bump()
+            return
+        with self._lock:
+            if self.epoch != "log":
+                self.epoch, self._counter = "log", change_id
+            self._counter = max(self._counter, change_id)
+
+    def reset(self):
+        """Test hook: start over with a fresh epoch, as tests recreate the change log and its ids restart."""
+        with self._lock:
+            self.epoch = secrets.token_hex(4)
+            self._counter = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.epoch}.{self._counter}"'
+
+
+catalog_version = CatalogVersion()
+invalidation_bus.subscribe("catalog", catalog_version.advance)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(request: Request, response: Response) -> Optional[Response]:
+    """Return a 304 when the client already holds the current catalog version.
+
+    Otherwise sets ETag and Cache-Control on ``response`` and returns None.
+    Read the version before querying: a write racing the query then yields
+    an older ETag for newer data, which only costs the client a refetch.
+    """
+    etag = catalog_version.etag
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
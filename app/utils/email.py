@@ -1,37 +1,229 @@
-import os
 import base64
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
-from app.config import FROM_EMAIL, SENDGRID_API_KEY
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
 
-def send_invoice_email(to_email: str, subject: str, html_content: str, pdf_path: str = None):
-    print("Preparing to send email to:", to_email)
-    print("Attachment path received:", pdf_path)
+from app.config import (
+    EMAIL_BATCH_SIZE,
+    EMAIL_BATCH_WINDOW,
+    EMAIL_MAX_CONNECTIONS,
+    EMAIL_MAX_RETRIES,
+    EMAIL_RETRY_BASE_SECONDS,
+    FROM_EMAIL,
+    SENDGRID_API_KEY,
+    SENDGRID_API_URL,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# SendGrid accepts at most this many personalizations per /v3/mail/send call
+MAX_PERSONALIZATIONS = 1000
+
+
+class EmailDeliveryError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Attachment:
+    filename: str
+    content: str  # base64
+    type: str
+
+
+@dataclass(frozen=True)
+class OutgoingEmail:
+    to_email: str
+    subject: str
+    html_content: str
+    attachments: Tuple[Attachment, ...] = ()
+
+    def batch_key(self):
+        """Messages with the same key can share one API call, one personalization each."""
+        return self.subject, self.html_content, self.attachments
+
+
+def _payload(from_email: str, messages) -> dict:
+    first = messages[0]
+    payload = {
+        "personalizations": [{"to": [{"email": message.to_email}]} for message in messages],
+        "from": {"email": from_email},
+        "subject": first.subject,
+        "content": [{"type": "text/html", "value": first.html_content}],
+    }
+    if first.attachments:
+        payload["attachments"] = [
+            {"content": a.content, "filename": a.filename, "type": a.type, "disposition": "attachment"}
+            for a in first.attachments
+        ]
+    return payload
+
+
+class EmailDelivery:
+    """Sends mail through SendGrid's v3 API over a persistent connection pool.
+
+    ``send`` posts one message right away from the calling thread; that is
+    the path for per-recipient mail such as invoices, which can never share
+    a call. ``submit`` is for the same content going to many recipients: it
+    queues the message and returns a Future, and a background thread waits
+    up to ``batch_window`` seconds for more, coalesces messages with
+    identical content into a single call and sends the calls in parallel
+    across the pool. Both retry transport errors, 429s and 5xxs with
+    jittered exponential backoff.
+    """
 
-    message = Mail(
-        from_email=FROM_EMAIL,
-        to_emails=to_email,
-        subject=subject,
-        html_content=html_content
-    )
+    def __init__(
+        self,
+        api_url: str = SENDGRID_API_URL,
+        api_key: Optional[str] = SENDGRID_API_KEY,
+        from_email: Optional[str] = FROM_EMAIL,
+        batch_size: int = EMAIL_BATCH_SIZE,
+        batch_window: float = EMAIL_BATCH_WINDOW,
+        max_retries: int = EMAIL_MAX_RETRIES,
+        retry_base: float = EMAIL_RETRY_BASE_SECONDS,
+        transport: Optional["httpx.BaseTransport"] = None,
+    ):
+        # httpx is imported with the first delivery, not with the app
+        import httpx
 
+        self.from_email = from_email
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.client = httpx.Client(
+            base_url=api_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=EMAIL_MAX_CONNECTIONS, max_keepalive_connections=EMAIL_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(10.0),
+            transport=transport,
+        )
+        # One sender per pooled connection so distinct messages go out in parallel
+        self._senders = ThreadPoolExecutor(EMAIL_MAX_CONNECTIONS, thread_name_prefix="email-send")
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.api_calls = 0
+        self.messages_sent = 0
+
+    def submit(self, message: OutgoingEmail) -> Future:
+        future = Future()
+        self._queue.put((message, future))
+        self._ensure_thread()
+        return future
+
+    def send(self, message: OutgoingEmail):
+        """Send one message now, without a batch window; raises EmailDeliveryError when delivery ultimately fails."""
+        self._post(_payload(self.from_email, [message]))
+        with self._lock:
+            self.messages_sent += 1
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._senders.shutdown(wait=True)
+        self.client.close()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="email-delivery", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            groups = {}
+            for message, future in self._collect(item):
+                groups.setdefault(message.batch_key(), []).append((message, future))
+            for group in groups.values():
+                for i in range(0, len(group), MAX_PERSONALIZATIONS):
+                    self._senders.submit(self._deliver, group[i:i + MAX_PERSONALIZATIONS])
+
+    def _deliver(self, group):
+        try:
+            self._post(_payload(self.from_email, [message for message, _ in group]))
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.messages_sent += len(group)
+        for _, future in group:
+            future.set_result(None)
+
+    def _post(self, payload: dict):
+        import httpx
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.post("/v3/mail/send", json=payload)
+            except httpx.TransportError as e:
+                error = EmailDeliveryError(f"SendGrid unreachable: {e}")
+            else:
+                with self._lock:
+                    self.api_calls += 1
+                if response.status_code < 300:
+                    return
+                error = EmailDeliveryError(f"SendGrid returned {response.status_code}: {response.text[:200]}")
+                if response.status_code != 429 and response.status_code < 500:
+                    raise error
+            if attempt < self.max_retries:
+                delay = random.uniform(0, self.retry_base * 2 ** attempt)
+                logger.warning("%s; retrying in %.2fs", error, delay)
+                time.sleep(delay)
+        raise error
+
+
+_delivery = None
+_delivery_lock = threading.Lock()
+
+
+def get_delivery() -> EmailDelivery:
+    global _delivery
+    with _delivery_lock:
+        if _delivery is None:
+            _delivery = EmailDelivery()
+        return _delivery
+
+
+def send_invoice_email(to_email: str, subject: str, html_content: str, pdf_path: str = None):
+    attachments = ()
     if pdf_path and os.path.exists(pdf_path):
         with open(pdf_path, "rb") as f:
-            data = f.read()
-            encoded = base64.b64encode(data).decode()
-            attachment = Attachment(
-                FileContent(encoded),
-                FileName("invoice.pdf"),
-                FileType("application/pdf"),
-                Disposition("attachment")
-            )
-            message.attachment = attachment
-    else:
-        print("Attachment not found or not provided:", pdf_path)
-
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        print("Email sent:", response.status_code)
-    except Exception as e:
-        print("SendGrid error:", e)
+            encoded = base64.b64encode(f.read()).decode()
+        attachments = (Attachment("invoice.pdf", encoded, "application/pdf"),)
+    elif pdf_path:
+        logger.warning("Invoice attachment not found: %s", pdf_path)
+
+    get_delivery().send(OutgoingEmail(to_email, subject, html_content, attachments))
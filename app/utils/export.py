@@ -0,0 +1,61 @@
+import csv
+import enum
+import io
+import json
+from typing import Literal
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are pulled from the cursor and flushed to the client this many at a time
+EXPORT_BATCH_SIZE = 1000
+
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _csv_lines(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(values)
+    return buffer.getvalue()
+
+
+def encode_rows(rows, fields, fmt: ExportFormat) -> str:
+    if fmt == "csv":
+        return _csv_lines([_plain(row[field]) for field in fields] for row in rows)
+    return "".join(
+        json.dumps({field: _plain(row[field]) for field in fields}) + "\n"
+        for row in rows
+    )
+
+
+def _header(fields, fmt: ExportFormat) -> str:
+    return _csv_lines([fields]) if fmt == "csv" else ""
+
+
+def stream_rows(db, stmt, fields, fmt: ExportFormat, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield ``stmt``'s rows encoded as NDJSON/CSV, one batch at a time.
+
+    ``yield_per`` keeps a server-side cursor open, so only ``batch_size``
+    rows are ever held in memory regardless of the table size.
+    """
+    yield _header(fields, fmt)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.mappings().partitions():
+        yield encode_rows(partition, fields, fmt)
+
+
+async def stream_rows_async(db, stmt, fields, fmt: ExportFormat, batch_size: int = EXPORT_BATCH_SIZE):
+    yield _header(fields, fmt)
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for partition in result.mappings().partitions():
+        yield encode_rows(partition, fields, fmt)
+
+
+def export_headers(name: str, fmt: ExportFormat) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from fastapi import Response
+
+from app.crud.product import PRODUCT_FIELDS
+from app.utils.images import variant_urls
+
+
+def json_response(payload, response: Optional[Response] = None) -> Response:
+    """Render ``payload`` with orjson, bypassing the route's response_model.
+
+    Only for data read straight from our own tables: nothing is validated.
+    Headers already set on the injected ``response`` (ETag, Cache-Control)
+    are carried over, since FastAPI only merges them into values it
+    serializes itself.
+    """
+    import orjson
+
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return Response(orjson.dumps(payload), media_type="application/json", headers=headers)
+
+
+def product_row(row) -> dict:
+    """A PRODUCT_FIELDS row shaped like schemas.Product, variants included."""
+    # zip over the plain tuple is about twice as fast as going through row._mapping
+    item = dict(zip(PRODUCT_FIELDS, row))
+    item["variants"] = variant_urls(item["image"])
+    return item
+
+
+def rows_as_dicts(fields, rows) -> list:
+    return [dict(zip(fields, row)) for row in rows]
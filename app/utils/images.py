@@ -0,0 +1,148 @@
+import functools
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from app import database
+from app.config import IMAGE_POOL_WORKERS, IMAGE_VARIANTS
+from app.utils import uploads
+from app.utils.invalidation import invalidation_bus
+from app.utils.pools import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+
+def parse_variants(spec: str) -> Dict[str, int]:
+    variants = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, size = item.partition(":")
+        variants[name.strip()] = int(size)
+    return variants
+
+
+VARIANTS = parse_variants(IMAGE_VARIANTS)
+
+
+class RenderedVariants:
+    """Which stored images have all their derivatives on disk, looked up once per process.
+
+    Catalog reads would otherwise stat every variant of every row. A
+    finished derivative job publishes the image on the "images" topic,
+    which makes every worker look again.
+    """
+
+    def __init__(self):
+        self._known: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, path: str) -> bool:
+        known = self._known.get(path)
+        if known is not None:
+            return known
+        # Checked under the lock, so a forget() for a job that just finished cannot be overwritten
+        with self._lock:
+            known = all(
+                os.path.exists(os.path.join(uploads.UPLOAD_DIR, uploads.derivative_path(path, name)))
+                for name in VARIANTS
+            )
+            self._known[path] = known
+            return known
+
+    def forget(self, key: Optional[str], change_id: Optional[int] = None):
+        """Invalidation bus handler; ``key`` is a stored path, None forgets everything."""
+        with self._lock:
+            if key is None:
+                self._known.clear()
+            else:
+                self._known.pop(key, None)
+
+
+rendered_variants = RenderedVariants()
+invalidation_bus.subscribe("images", rendered_variants.forget)
+
+
+def variant_urls(image_url: str) -> Dict[str, str]:
+    """Public URLs of the derivatives of a stored image, once they have all been rendered.
+
+    Images still being rendered, or whose rendering failed, get none
+    rather than URLs that do not exist.
+    """
+    path = uploads.stored_path(image_url)
+    if path is None or not VARIANTS or not rendered_variants(path):
+        return {}
+    return {name: uploads.UPLOAD_URL_PREFIX + uploads.derivative_path(path, name) for name in VARIANTS}
+
+
+def generate_variants(source: str, targets: Dict[str, str], variants: Dict[str, int]) -> list:
+    """Decode ``source`` once and write a WebP thumbnail per variant.
+
+    ``targets`` maps variant names to absolute output paths; variants that
+    already exist (the same bytes were uploaded before) are skipped. Raises
+    if the source is not a decodable image.
+    """
+    from PIL import Image, ImageOps
+
+    pending = {name: path for name, path in targets.items() if not os.path.exists(path)}
+    if not pending:
+        return []
+    with Image.open(source) as opened:
+        opened.load()
+        image = ImageOps.exif_transpose(opened)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    written = []
+    for name, path in pending.items():
+        edge = variants[name]
+        variant = image.copy()
+        variant.thumbnail((edge, edge))
+        part_path = path + ".part"
+        variant.save(part_path, format="WEBP", quality=80)
+        os.replace(part_path, path)
+        written.append(path)
+    return written
+
+
+def _announce(path: str):
+    """Let every worker list the new derivatives, and move the catalog ETag past reads that lacked them."""
+    session_factory = invalidation_bus.session_factory or database.sessionlocal
+    try:
+        with session_factory() as db:
+            invalidation_bus.publish(db, "images", path)
+            invalidation_bus.publish(db, "catalog")
+            db.commit()
+    except Exception:
+        logger.exception("Announcing the derivatives of %s failed", path)
+
+
+def _rendered(path: str, future):
+    error = future.exception()
+    if error is not None:
+        logger.warning("Image derivative generation failed: %s", error)
+    elif future.result():
+        _announce(path)
+
+
+def schedule_variants(image_url: str):
+    """Render the configured derivatives of a freshly stored image in the background.
+
+    Only submits work to the image pool, so the upload request does not wait
+    for decoding or encoding.
+    """
+    path = uploads.stored_path(image_url)
+    if path is None or not VARIANTS:
+        return
+    source = os.path.join(uploads.UPLOAD_DIR, path)
+    targets = {name: os.path.join(uploads.UPLOAD_DIR, uploads.derivative_path(path, name)) for name in VARIANTS}
+    if IMAGE_POOL_WORKERS <= 0:
+        try:
+            written = generate_variants(source, targets, VARIANTS)
+        except Exception as e:
+            logger.warning("Image derivative generation failed: %s", e)
+            return
+        if written:
+            _announce(path)
+        return
+    future = get_process_pool("images", IMAGE_POOL_WORKERS).submit(generate_variants, source, targets, VARIANTS)
+    future.add_done_callback(functools.partial(_rendered, path))
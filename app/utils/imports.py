@@ -0,0 +1,246 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from app.auth.hashing import hash_passwords
+from app.crud.product import PRODUCT_IMPORT_FIELDS, upsert_products
+from app.crud.user import existing_emails, insert_users
+from app.schemas.product import ProductImportRow
+from app.schemas.user import UserCreate, UserType
+from app.utils.export import ExportFormat
+from app.utils.invalidation import invalidation_bus
+
+
+def guess_format(filename: Optional[str], content_type: Optional[str]) -> ExportFormat:
+    if (filename or "").lower().endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    return "ndjson"
+
+
+def iter_records(fileobj, fmt: ExportFormat) -> Iterator[Tuple[int, object]]:
+    """Yield ``(line number, record)`` pairs from a binary file, one row at a time.
+
+    ``record`` is a dict, or the exception that made the line unreadable.
+    Only the current line is decoded, so memory does not grow with the file.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    line_number = 0
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                line_number = reader.line_num
+                # Blank cells mean "not given", like a missing NDJSON key
+                yield line_number, {k: (v if v != "" else None) for k, v in record.items() if k is not None}
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, e
+                    continue
+                yield line_number, record if isinstance(record, dict) else ValueError("Expected a JSON object")
+    except (csv.Error, UnicodeDecodeError) as e:
+        # The rest of the file cannot be read reliably; report and stop
+        yield line_number + 1, e
+    finally:
+        text.detach()
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+class ImportReport:
+    def __init__(self, max_errors: Optional[int] = None):
+        self.max_errors = IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.received = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, line: int, error):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error if isinstance(error, str) else _describe(error)})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class UserImportReport(ImportReport):
+    """ImportReport that also lists rows skipped because the email already exists."""
+
+    def __init__(self, max_errors: Optional[int] = None):
+        super().__init__(max_errors)
+        self.created = 0
+        self.duplicates = 0
+        self.duplicate_rows: List[dict] = []
+
+    def add_duplicate(self, line: int, email: str):
+        self.duplicates += 1
+        if len(self.duplicate_rows) < self.max_errors:
+            self.duplicate_rows.append({"line": line, "email": email})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "duplicate_rows": self.duplicate_rows,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _valid_rows(records, report: ImportReport, schema):
+    for line, record in records:
+        report.received += 1
+        if isinstance(record, Exception):
+            report.add_error(line, record)
+            continue
+        try:
+            yield line, schema.model_validate(record)
+        except ValidationError as e:
+            report.add_error(line, e)
+
+
+def _product_rows(records, report: ImportReport):
+    for line, row in _valid_rows(records, report, ProductImportRow):
+        yield line, row.model_dump(include=set(PRODUCT_IMPORT_FIELDS))
+
+
+def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def write_batch(db, batch, report: ImportReport):
+    """Upsert one batch in its own transaction, which also publishes the "catalog" change.
+
+    If the batch is rejected, its rows are retried one at a time so the
+    report points at the offending lines instead of failing them all.
+    """
+    try:
+        upsert_products(db, [row for _, row in batch])
+        invalidation_bus.publish(db, "catalog")
+        db.commit()
+        report.upserted += len(batch)
+        return
+    except SQLAlchemyError:
+        db.rollback()
+    for line, row in batch:
+        try:
+            upsert_products(db, [row])
+            invalidation_bus.publish(db, "catalog")
+            db.commit()
+            report.upserted += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            report.add_error(line, str(e.orig if getattr(e, "orig", None) else e))
+
+
+def import_products(db, fileobj, fmt: ExportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    report = ImportReport()
+    for batch in _batches(_product_rows(iter_records(fileobj, fmt), report), batch_size):
+        write_batch(db, batch, report)
+    return report.as_dict()
+
+
+async def import_products_async(db, fileobj, fmt: ExportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Like ``import_products``; parsing runs in the threadpool, writes on the AsyncSession."""
+    report = ImportReport()
+    batches = _batches(_product_rows(iter_records(fileobj, fmt), report), batch_size)
+    while batch := await run_in_threadpool(next, batches, None):
+        await db.run_sync(write_batch, batch, report)
+    return report.as_dict()
+
+
+def skip_existing_users(db, batch, report: UserImportReport):
+    """Drop rows whose email is taken (in the table or earlier in the batch) before hashing them."""
+    taken = existing_emails(db, [user.email for _, user in batch])
+    fresh = []
+    for line, user in batch:
+        if user.email in taken:
+            report.add_duplicate(line, user.email)
+        else:
+            taken.add(user.email)
+            fresh.append((line, user))
+    return fresh
+
+
+def insert_user_batch(db, batch, hashes, report: UserImportReport):
+    """Insert one batch of users with their password hashes in a single transaction.
+
+    Emails claimed by a concurrent writer since ``skip_existing_users`` are
+    skipped by the ON CONFLICT clause and reported as duplicates too.
+    """
+    rows = [
+        {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "password": hashed,
+            # A blank CSV cell or an NDJSON null reaches here as None
+            "user_type": (user.user_type or UserType.normal).value,
+        }
+        for (_, user), hashed in zip(batch, hashes)
+    ]
+    try:
+        inserted = insert_users(db, rows)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        for line, _ in batch:
+            report.add_error(line, str(e.orig if getattr(e, "orig", None) else e))
+        return
+    for line, user in batch:
+        if user.email in inserted:
+            report.created += 1
+        else:
+            report.add_duplicate(line, user.email)
+
+
+def _user_batches(fileobj, fmt: ExportFormat, batch_size: int, report: UserImportReport):
+    return _batches(_valid_rows(iter_records(fileobj, fmt), report, UserCreate), batch_size)
+
+
+def import_users(db, fileobj, fmt: ExportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    report = UserImportReport()
+    for batch in _user_batches(fileobj, fmt, batch_size, report):
+        batch = skip_existing_users(db, batch, report)
+        if batch:
+            insert_user_batch(db, batch, hash_passwords([user.password for _, user in batch]), report)
+    return report.as_dict()
+
+
+async def import_users_async(db, fileobj, fmt: ExportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    report = UserImportReport()
+    batches = _user_batches(fileobj, fmt, batch_size, report)
+    while batch := await run_in_threadpool(next, batches, None):
+        batch = await db.run_sync(skip_existing_users, batch, report)
+        if batch:
+            hashes = await run_in_threadpool(hash_passwords, [user.password for _, user in batch])
+            await db.run_sync(insert_user_batch, batch, hashes, report)
+    return report.as_dict()
@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import INVALIDATION_BUS_ENABLED, INVALIDATION_POLL_INTERVAL, INVALIDATION_RETENTION
+from app.models.cache_invalidation import CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+# Receives the invalidated key (None for the whole topic) and the change-log id (None when the bus is disabled)
+Handler = Callable[[Optional[str], Optional[int]], None]
+
+_STAGED = "staged_invalidations"
+
+
+class InvalidationBus:
+    """Fans cache invalidations out to every worker process through the database.
+
+    ``publish`` stages a cache_invalidations row in the writer's own
+    transaction, so an invalidation exists exactly when the write it
+    describes committed. The committing process applies it as soon as the
+    commit returns; every other worker reads it on its next poll, at most
+    ``poll_interval`` seconds later. On SQLite a poll is one
+    ``PRAGMA data_version``, and the table is only queried when another
+    connection committed since the last one.
+
+    Change ids grow monotonically and are the same in every worker, so
+    handlers can also use them as a shared version number.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = INVALIDATION_BUS_ENABLED,
+        poll_interval: float = INVALIDATION_POLL_INTERVAL,
+        retention: float = INVALIDATION_RETENTION,
+        engine=None,
+        session_factory=None,
+    ):
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.engine = engine
+        self.session_factory = session_factory
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._data_version = None
+        self._last_poll = None
+        self._last_prune = 0.0
+        self.last_id = 0
+        self.published = 0
+        self.received = 0
+        self.resyncs = 0
+
+    def subscribe(self, topic: str, handler: Handler):
+        self._handlers[topic].append(handler)
+
+    def publish(self, db, topic: str, *keys: str):
+        """Invalidate ``keys`` of ``topic`` (the whole topic when none) once ``db`` commits.
+
+        Works with a Session or an AsyncSession; nothing is sent if the
+        transaction rolls back.
+        """
+        session = getattr(db, "sync_session", db)
+        staged = session.info.setdefault(_STAGED, [])
+        for key in keys or (None,):
+            row = None
+            if self.enabled:
+                row = CacheInvalidation(topic=topic, key=key, created_at=time.time())
+                session.add(row)
+            staged.append((self, topic, key, row))
+
+    def apply(self, topic: str, key: Optional[str], change_id: Optional[int]):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(key, change_id)
+            except Exception:
+                logger.exception("Invalidation handler for %r failed", topic)
+
+    def start(self):
+        if self._thread or not self.enabled:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def poll(self, conn) -> int:
+        """Apply changes other connections committed since the last poll; returns how many."""
+        now = time.time()
+        if self._last_poll is None or now - self._last_poll > self.retention:
+            # First poll, or so late that rows we never saw may be pruned: start over
+            self.resync(conn)
+            self._last_poll = now
+            return 0
+        self._last_poll = now
+
+        if conn.dialect.name == "sqlite":
+            data_version = conn.exec_driver_sql("PRAGMA data_version").scalar()
+            conn.rollback()
+            if data_version == self._data_version:
+                return 0
+            self._data_version = data_version
+
+        rows = conn.execute(
+            select(CacheInvalidation.id, CacheInvalidation.topic, CacheInvalidation.key)
+            .where(CacheInvalidation.id > self.last_id)
+            .order_by(CacheInvalidation.id)
+        ).all()
+        conn.rollback()
+        for change_id, topic, key in rows:
+            self.apply(topic, key, change_id)
+            self.last_id = change_id
+        with self._lock:
+            self.received += len(rows)
+        return len(rows)
+
+    def resync(self, conn):
+        """Drop everything subscribers cached and continue from the newest change.
+
+        Every topic is handed the newest id of any topic: the newest row of
+        a topic may have been pruned, and an id from before that would be a
+        version number some worker already used for older data.
+        """
+        self.last_id = conn.execute(select(func.max(CacheInvalidation.id))).scalar() or 0
+        conn.rollback()
+        for topic in list(self._handlers):
+            self.apply(topic, None, self.last_id)
+        with self._lock:
+            self.resyncs += 1
+
+    def prune(self):
+        """Delete rows older than ``retention``; any worker may do it, at most once per ``retention / 10``.
+
+        The newest row always stays, so MAX(id) never goes back and resync
+        never hands out a version that was already used.
+        """
+        now = time.time()
+        if now - self._last_prune < self.retention / 10:
+            return
+        self._last_prune = now
+        session_factory = self.session_factory or database.sessionlocal
+        with session_factory() as db:
+            newest = select(func.max(CacheInvalidation.id)).scalar_subquery()
+            db.execute(delete(CacheInvalidation).where(
+                CacheInvalidation.created_at < now - self.retention,
+                CacheInvalidation.id < newest,
+            ))
+            db.commit()
+
+    def _loop(self):
+        conn = None
+        while not self._stopping.is_set():
+            try:
+                if conn is None:
+                    # A connection of our own: data_version only moves for commits made elsewhere
+                    conn = (self.engine or database.read_engine).connect()
+                    self._last_poll = None
+                self.poll(conn)
+                self.prune()
+            except Exception:
+                logger.exception("Invalidation bus poll failed")
+                if conn is not None:
+                    conn.close()
+                conn = None
+            self._stopping.wait(self.poll_interval)
+        if conn is not None:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "last_id": self.last_id,
+                "published": self.published,
+                "received": self.received,
+                "resyncs": self.resyncs,
+            }
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_staged(session):
+    # Local delivery, so the committing worker never serves stale data even briefly
+    for bus, topic, key, row in session.info.pop(_STAGED, ()):
+        change_id = None
+        if row is not None:
+            change_id = inspect(row).identity[0]
+            with bus._lock:
+                bus.published += 1
+        bus.apply(topic, key, change_id)
+
+
+# Runs after _deliver_staged on commit, and alone on rollback or close
+@event.listens_for(Session, "after_transaction_end")
+def _discard_staged(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_STAGED, None)
+
+
+invalidation_bus = InvalidationBus()
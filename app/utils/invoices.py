@@ -0,0 +1,31 @@
+from app.utils.email import send_invoice_email
+from app.utils.job_queue import job_handler
+from app.utils.pdf_generator import generate_invoice_pdf
+from app.utils.templates import render_invoice
+
+CHECKOUT_COMPLETED_JOB = "checkout_completed"
+
+
+def _field(obj, key):
+    # Indexing works on plain dicts and on StripeObject, which has no .get()
+    return obj[key] if obj is not None and key in obj else None
+
+
+def checkout_job_payload(session) -> dict:
+    return {
+        "session_id": session["id"],
+        "amount_paid": (_field(session, "amount_total") or 0) / 100,
+        "customer_email": _field(_field(session, "customer_details"), "email"),
+    }
+
+
+@job_handler(CHECKOUT_COMPLETED_JOB)
+def deliver_invoice(payload: dict):
+    """Render the invoice PDF for a paid checkout session and email it to the customer."""
+    pdf_path = generate_invoice_pdf(payload["session_id"], payload["amount_paid"])
+    send_invoice_email(
+        to_email=payload["customer_email"] or "test@example.com",
+        subject="Invoice - Payment Successful",
+        html_content=render_invoice("invoice_email", payload["session_id"], payload["amount_paid"]),
+        pdf_path=pdf_path
+    )
@@ -0,0 +1,169 @@
+import json
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import (
+    JOB_LOCK_TIMEOUT,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_WORKERS,
+)
+from app.models.job import DeadLetterJob, Job
+from app.utils.webhook_events import processed_events
+
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable[[dict], None]] = {}
+
+
+def job_handler(kind: str):
+    """Register the function that runs jobs of ``kind``; it receives the decoded payload."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: dict, delay: float = 0) -> Job:
+    """Add a job to the caller's transaction; it becomes visible to workers on commit."""
+    now = time.time()
+    job = Job(kind=kind, payload=json.dumps(payload), status="pending", attempts=0, run_after=now + delay, created_at=now)
+    db.add(job)
+    return job
+
+
+# A single UPDATE ... RETURNING both picks and locks the job, so concurrent
+# workers (threads or processes) can never claim the same row.
+_CLAIM = text("""
+    UPDATE jobs
+    SET status = 'running', locked_at = :now, attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE (status = 'pending' AND run_after <= :now)
+           OR (status = 'running' AND locked_at < :stale)
+        ORDER BY run_after
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts
+""")
+
+
+def claim_next(db: Session):
+    now = time.time()
+    row = db.execute(_CLAIM, {"now": now, "stale": now - JOB_LOCK_TIMEOUT}).first()
+    db.commit()
+    return row
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _record_failure(db: Session, job, error: Exception):
+    if job.attempts >= JOB_MAX_ATTEMPTS:
+        db.add(DeadLetterJob(
+            job_id=job.id,
+            kind=job.kind,
+            payload=job.payload,
+            attempts=job.attempts,
+            last_error=repr(error),
+            failed_at=time.time(),
+        ))
+        db.execute(delete(Job).where(Job.id == job.id))
+        logger.error("Job %s (%s) moved to dead letter after %s attempts: %r", job.id, job.kind, job.attempts, error)
+    else:
+        db.query(Job).filter(Job.id == job.id).update({
+            "status": "pending",
+            "run_after": time.time() + retry_delay(job.attempts),
+            "last_error": repr(error),
+        })
+    db.commit()
+
+
+def run_job(db: Session, job) -> bool:
+    """Run one claimed job, then delete it, reschedule it or dead-letter it."""
+    try:
+        handler = _handlers[job.kind]
+        handler(json.loads(job.payload))
+    except Exception as e:
+        db.rollback()
+        _record_failure(db, job, e)
+        return False
+    db.execute(delete(Job).where(Job.id == job.id))
+    db.commit()
+    return True
+
+
+def run_pending(session_factory=None, limit: Optional[int] = None) -> int:
+    """Run due jobs on the calling thread until none are left; returns how many ran."""
+    session_factory = session_factory or database.sessionlocal
+    ran = 0
+    with session_factory() as db:
+        while limit is None or ran < limit:
+            job = claim_next(db)
+            if job is None:
+                break
+            run_job(db, job)
+            ran += 1
+    return ran
+
+
+class JobWorker:
+    """Pool of threads draining the jobs table.
+
+    Threads sleep up to JOB_POLL_INTERVAL between polls; ``notify`` wakes
+    them straight away when a job is enqueued by this process.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, session_factory=None):
+        self.workers = workers
+        self.session_factory = session_factory
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads or self.workers <= 0:
+            return
+        self._stopping.clear()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                ran = run_pending(self.session_factory, limit=1)
+            except Exception:
+                logger.exception("Job worker poll failed")
+                ran = 0
+            if not ran:
+                try:
+                    processed_events.prune(self.session_factory)
+                except Exception:
+                    logger.exception("Pruning processed events failed")
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+
+
+job_worker = JobWorker()
@@ -1,20 +1,3 @@
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
-
-SECRET_KEY = "your-secret-key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
-
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def verify_token(token: str, secret_key=SECRET_KEY, algorithm=ALGORITHM):
-    try:
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
-        return payload
-    except JWTError:
-        return None
+# Kept for existing imports; tokens are issued and verified by app.auth.tokens
+from app.auth.tokens import create_access_token, verify_token
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
@@ -0,0 +1,228 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Upper bounds, in seconds, of the request latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the SQL-statements-per-request buckets
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Statement count and time of the request being served, set by MetricsMiddleware
+_request_sql: ContextVar[Optional[List[float]]] = ContextVar("request_sql", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        """Record ``value``; callers hold the registry lock."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Counter:
+    """Value per label set, exposed as a counter (or a gauge when ``kind="gauge"``)."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], kind: str = "counter"):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.kind = kind
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        """Add ``amount``; callers hold the registry lock."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class RequestMetrics:
+    """Per-route request latency, in-flight requests and SQL statements per request.
+
+    Every finished request takes the lock once; rendering happens only when
+    /metrics is scraped. Extra sources (cache stats) register a named
+    collector returning ``(name, type, help, value)`` tuples read at scrape time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Time to serve a request, by route template",
+            ("method", "route", "status"), LATENCY_BUCKETS,
+        )
+        self.statements = Histogram(
+            "http_request_db_statements", "SQL statements executed per request",
+            ("method", "route"), STATEMENT_BUCKETS,
+        )
+        self.statement_seconds = Counter(
+            "http_request_db_seconds_total", "Time spent executing SQL statements while serving requests",
+            ("method", "route"),
+        )
+        self.in_flight = Counter(
+            "http_requests_in_flight", "Requests currently being served", ("method",), kind="gauge",
+        )
+        self._collectors: Dict[str, Callable[[], Iterable[Tuple[str, str, str, float]]]] = {}
+
+    def started(self, method: str):
+        with self._lock:
+            self.in_flight.inc((method,))
+
+    def finished(self, method: str, route: str, status: int, seconds: float, sql: List[float]):
+        with self._lock:
+            self.in_flight.inc((method,), -1)
+            self.latency.observe((method, route, str(status)), seconds)
+            self.statements.observe((method, route), sql[0])
+            self.statement_seconds.inc((method, route), sql[1])
+
+    def register_collector(self, name: str, collector: Callable[[], Iterable[Tuple[str, str, str, float]]]):
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                line
+                for metric in (self.latency, self.in_flight, self.statements, self.statement_seconds)
+                for line in metric.render()
+            ]
+        for collector in self._collectors.values():
+            for name, kind, help, value in collector():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for metric in (self.latency, self.statements):
+                metric._series.clear()
+            for metric in (self.statement_seconds, self.in_flight):
+                metric._values.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def stats_collector(prefix: str, stats: Callable[[], dict], counters: Tuple[str, ...], help: str):
+    """Expose a ``stats()`` dict as metrics: keys in ``counters`` as ``<prefix>_<key>_total``, numbers as gauges."""
+    def collect():
+        for key, value in stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                yield f"{prefix}_{key}_total", "counter", f"{help}: {key}", value
+            else:
+                yield f"{prefix}_{key}", "gauge", f"{help}: {key}", value
+    return collect
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_sql.get() is not None:
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql = _request_sql.get()
+    if sql is not None:
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            sql[1] += time.perf_counter() - starts.pop()
+        sql[0] += 1
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start so the next one is not timed against it
+    starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    """Count statements run on ``engine`` (a sync Engine, or an AsyncEngine's sync_engine) against the current request."""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route, so /products/1 and /products/2 share a label."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding ``request_metrics``; labels requests by route template, not raw path."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.started(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.finished(method, route_template(scope), status, time.perf_counter() - start, sql)
+            _request_sql.reset(token)
@@ -1,41 +1,73 @@
-from xhtml2pdf import pisa
+import logging
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Sequence, Tuple
+import math
 import os
 
+from app.config import PDF_POOL_WORKERS
+from app.utils.pools import get_process_pool
+from app.utils.templates import render_invoice
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INVOICES_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "..", "invoices"))
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _invoices_dir(path: str) -> str:
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def render_invoice_pdf(session_id: str, amount: float) -> bytes:
+    # xhtml2pdf (with reportlab and pyhanko) takes about a second to import;
+    # load it on the first invoice rather than at app startup
+    from xhtml2pdf import pisa
+
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(render_invoice("invoice_pdf", session_id, amount), dest=buffer)
+    if pisa_status.err:
+        raise RuntimeError(f"Failed to generate PDF for {session_id}")
+    return buffer.getvalue()
+
+
+def _render_batch(invoices: Sequence[Tuple[str, float]]) -> List[bytes]:
+    return [render_invoice_pdf(session_id, amount) for session_id, amount in invoices]
+
+
+def render_invoices(invoices: Sequence[Tuple[str, float]]) -> List[bytes]:
+    """Render ``(session_id, amount)`` invoices to PDF bytes, in order.
+
+    The batch is split into one contiguous chunk per PDF_POOL_WORKERS
+    process, so N invoices cost one pool round-trip per core instead of N.
+    """
+    invoices = list(invoices)
+    if PDF_POOL_WORKERS <= 0 or not invoices:
+        return _render_batch(invoices)
+    pool = get_process_pool("pdf", PDF_POOL_WORKERS)
+    size = math.ceil(len(invoices) / PDF_POOL_WORKERS)
+    futures = [pool.submit(_render_batch, invoices[i:i + size]) for i in range(0, len(invoices), size)]
+    return [pdf for future in futures for pdf in future.result()]
+
+
+def write_invoice_pdf(session_id: str, pdf: bytes) -> str:
+    file_path = os.path.join(_invoices_dir(INVOICES_DIR), f"invoice_{session_id}.pdf")
+    with open(file_path, "wb") as f:
+        f.write(pdf)
+    return file_path
+
+
+def generate_invoice_pdfs(invoices: Sequence[Tuple[str, float]]) -> List[str]:
+    """Batch version of ``generate_invoice_pdf``: render on the pool, then write each file."""
+    invoices = list(invoices)
+    pdfs = render_invoices(invoices)
+    return [write_invoice_pdf(session_id, pdf) for (session_id, _), pdf in zip(invoices, pdfs)]
+
+
 def generate_invoice_pdf(session_id: str, amount: float) -> str:
-    try:
-        html = f"""
-        <html>
-            <body>
-                <h2>Invoice</h2>
-                <p><strong>Session ID:</strong> {session_id}</p>
-                <p><strong>Amount Paid:</strong> {amount} USD</p>
-            </body>
-        </html>
-        """
-
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        invoices_dir = os.path.join(base_dir, "..", "..", "invoices")
-        invoices_dir = os.path.abspath(invoices_dir)
-
-        if not os.path.exists(invoices_dir):
-            os.makedirs(invoices_dir)
-
-        file_path = os.path.join(invoices_dir, f"invoice_{session_id}.pdf")
-        file_path = os.path.abspath(file_path)
-
-        print(f"Generating PDF at: {file_path}")
-
-        with open(file_path, "wb") as f:
-            pisa_status = pisa.CreatePDF(html, dest=f)
-
-        if pisa_status.err:
-            print("Failed to generate PDF.")
-            return ""
-        else:
-            print("PDF generated successfully.")
-
-        return file_path
-
-    except Exception as e:
-        print("Error in PDF generation:", e)
-        return ""
+    """Render and write one invoice; failures propagate so the job queue records the cause."""
+    file_path = generate_invoice_pdfs([(session_id, amount)])[0]
+    logger.info("Invoice PDF for %s written to %s", session_id, file_path)
+    return file_path
@@ -0,0 +1,29 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_process_pool(name: str, max_workers: int) -> ProcessPoolExecutor:
+    """Return the named process pool, starting it on first use.
+
+    Workers are spawned rather than forked: the server process runs the
+    event loop and a threadpool, and forking a multi-threaded process can
+    leave locks held in the child.
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[name] = pool
+        return pool
+
+
+def shutdown_pools(wait: bool = True):
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,180 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from app.config import N_PLUS_ONE_THRESHOLD, QUERY_LOG_PARAMETERS, QUERY_STATS_SIZE, SLOW_QUERY_MS
+from app.utils.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Statement shape -> executions in the request being served, set by QueryLogMiddleware
+_request_shapes: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_shapes", default=None)
+
+# Expanded IN lists differ only in their number of placeholders
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+MAX_LOGGED_PARAMS = 500
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def redact_parameters(parameters, executemany: bool = False) -> str:
+    """Parameter types in place of their values, e.g. ``(str, int)`` or ``3 rows of (str, NoneType)``."""
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} rows of {redact_parameters(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+class QueryStats:
+    """Aggregated execution counts and timings per statement shape, plus recent N+1 findings.
+
+    At most ``maxsize`` shapes are tracked; statements of further shapes are
+    only counted in ``untracked``.
+    """
+
+    def __init__(self, maxsize: int, slow_ms: float, n_plus_one: int):
+        self.maxsize = maxsize
+        self.slow_ms = slow_ms
+        self.n_plus_one = n_plus_one
+        self._lock = threading.Lock()
+        self._shapes = {}
+        self._n_plus_one = deque(maxlen=50)
+        self.untracked = 0
+
+    def record(self, shape: str, seconds: float) -> bool:
+        """Add one execution; returns True when it was slow."""
+        slow = seconds * 1000 >= self.slow_ms
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is None:
+                if len(self._shapes) >= self.maxsize:
+                    self.untracked += 1
+                    return slow
+                entry = self._shapes[shape] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += slow
+        return slow
+
+    def record_n_plus_one(self, method: str, route: str, shape: str, count: int):
+        with self._lock:
+            self._n_plus_one.append({"method": method, "route": route, "statement": shape, "count": count})
+
+    def clear(self):
+        with self._lock:
+            self._shapes.clear()
+            self._n_plus_one.clear()
+            self.untracked = 0
+
+    def stats(self, limit: int = 20) -> dict:
+        with self._lock:
+            shapes = sorted(self._shapes.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+            return {
+                "slow_query_ms": self.slow_ms,
+                "n_plus_one_threshold": self.n_plus_one,
+                "tracked_shapes": len(self._shapes),
+                "untracked": self.untracked,
+                "statements": [
+                    {
+                        "statement": shape,
+                        "count": count,
+                        "total_ms": total * 1000,
+                        "mean_ms": total * 1000 / count,
+                        "max_ms": longest * 1000,
+                        "slow": slow,
+                    }
+                    for shape, (count, total, longest, slow) in shapes
+                ],
+                "n_plus_one": list(self._n_plus_one),
+            }
+
+
+query_stats = QueryStats(QUERY_STATS_SIZE, SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD)
+
+
+def explain(conn, statement: str, parameters) -> str:
+    """EXPLAIN QUERY PLAN on a raw cursor, so it is neither timed nor logged itself."""
+    if conn.dialect.name != "sqlite" or not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+        return ""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(f"  {row[-1]}" for row in cursor.fetchall())
+    except Exception as e:
+        return f"  (plan unavailable: {e})"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_log_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_log_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    shape = statement_shape(statement)
+    if query_stats.record(shape, seconds):
+        plan = "" if executemany else explain(conn, statement, parameters)
+        logged = repr(parameters)[:MAX_LOGGED_PARAMS] if QUERY_LOG_PARAMETERS else redact_parameters(parameters, executemany)
+        logger.warning(
+            "Slow query (%.1f ms): %s\nparameters: %s\nplan:\n%s",
+            seconds * 1000, statement, logged, plan,
+        )
+    shapes = _request_shapes.get()
+    if shapes is not None:
+        shapes[shape] = shapes.get(shape, 0) + 1
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start so the next one is not timed against it
+    starts = context.connection.info.get("query_log_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_queries(engine):
+    """Time every statement on ``engine`` (a sync Engine, or an AsyncEngine's sync_engine) into ``query_stats``."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryLogMiddleware:
+    """Pure ASGI middleware flagging requests that run one statement shape more than N_PLUS_ONE_THRESHOLD times."""
+
+    def __init__(self, app, stats: QueryStats = query_stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        shapes = {}
+        token = _request_shapes.set(shapes)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_shapes.reset(token)
+            for shape, count in shapes.items():
+                if count > self.stats.n_plus_one:
+                    route = route_template(scope)
+                    self.stats.record_n_plus_one(scope["method"], route, shape, count)
+                    logger.warning("Possible N+1: %s %s ran %d times: %s", scope["method"], route, count, shape)
@@ -1,29 +1,134 @@
-import stripe
+import hashlib
+import json
+import threading
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
 from app.config import STRIPE_SECRET_KEY
+from app.models.product import Product
+
+CURRENCY = "usd"
+
+
+@lru_cache(maxsize=None)
+def get_stripe():
+    """The Stripe SDK, imported on first use (it adds ~200 ms to startup) and given the API key."""
+    import stripe
+
+    if STRIPE_SECRET_KEY:
+        stripe.api_key = STRIPE_SECRET_KEY
+    return stripe
+
+
+class PriceCacheStats:
+    """Counts checkouts that reused a stored Stripe price versus ones that had to create it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+price_cache = PriceCacheStats()
+
+
+def unit_amount(price: float) -> int:
+    return int(round(price * 100))
+
+
+def idempotency_key(kind: str, params: dict) -> str:
+    """Key covering every request parameter: Stripe rejects a reused key sent with different ones."""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"catalog-{kind}-{digest[:32]}"
+
+
+def cached_price_id(product: Product) -> Optional[str]:
+    price_cache.record(product.stripe_price_id is not None)
+    return product.stripe_price_id
+
+
+def sync_stripe_price(product: Product) -> Tuple[str, str]:
+    """Create the Stripe Product (if missing) and a Price for the current price.
+
+    Makes network calls only; the caller stores the returned ids. Idempotency
+    keys derive from the full request, so two concurrent first checkouts
+    end up with the same Stripe objects.
+    """
+    stripe_product_id = product.stripe_product_id
+    if not stripe_product_id:
+        params = {"name": product.name, "metadata": {"product_id": product.id}}
+        if product.description:
+            params["description"] = product.description
+        stripe_product_id = get_stripe().Product.create(
+            **params, idempotency_key=idempotency_key("product", params)
+        ).id
+
+    params = {"product": stripe_product_id, "currency": CURRENCY, "unit_amount": unit_amount(product.price)}
+    price = get_stripe().Price.create(**params, idempotency_key=idempotency_key("price", params))
+    return stripe_product_id, price.id
+
+
+def store_stripe_ids(product: Product, stripe_product_id: str, stripe_price_id: str):
+    """UPDATE saving the synced ids, only while the row still has the name and price they were made for.
+
+    An update_product that committed during the Stripe calls wins; its
+    next checkout syncs again instead of reusing a Price for the old amount.
+    """
+    return (
+        update(Product)
+        .where(Product.id == product.id, Product.name == product.name, Product.price == product.price)
+        .values(stripe_product_id=stripe_product_id, stripe_price_id=stripe_price_id)
+    )
+
+
+def ensure_stripe_price(db: Session, product: Product) -> str:
+    price_id = cached_price_id(product)
+    if price_id is None:
+        stripe_product_id, price_id = sync_stripe_price(product)
+        db.execute(store_stripe_ids(product, stripe_product_id, price_id))
+        db.commit()
+    return price_id
+
+
+def invalidate_stripe_ids(product: Product, name: Optional[str] = None, price: Optional[float] = None):
+    """Forget Stripe ids made stale by an update, before the new values are applied.
+
+    Prices are immutable in Stripe, so a new price needs a new Price object;
+    a rename gets a new Product as well.
+    """
+    if name and name != product.name:
+        product.stripe_product_id = None
+        product.stripe_price_id = None
+    if price and unit_amount(price) != unit_amount(product.price):
+        product.stripe_price_id = None
 
 
-stripe.api_key = STRIPE_SECRET_KEY
-
-def create_checkout_session(product_name: str, product_price: int, currency="usd"):
-    try:
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=[
-                {
-                    "price_data": {
-                        "currency": currency,
-                        "product_data": {
-                            "name": product_name,
-                        },
-                        "unit_amount": product_price * 100,  
-                    },
-                    "quantity": 1,
-                },
-            ],
-            mode="payment",
-            success_url="https://localhost:8000/docs",
-            cancel_url="https://localhost:8000/docs",
-        )
-        return session.url
-    except Exception as e:
-        raise Exception(f"Stripe Checkout creation failed: {e}")
+def create_checkout_session(price_id: str, customer_email: Optional[str] = None) -> str:
+    params = {"customer_email": customer_email} if customer_email else {}
+    session = get_stripe().checkout.Session.create(
+        **params,
+        line_items=[{"price": price_id, "quantity": 1}],
+        mode="payment",
+        success_url="http://localhost:8000/docs",
+        cancel_url="http://localhost:8000/docs",
+    )
+    return session.url
@@ -0,0 +1,51 @@
+import html
+from string import Template
+
+
+class SafeHTML(str):
+    """Already-rendered markup that must not be escaped again (e.g. a nested fragment)."""
+
+
+class TemplateRegistry:
+    """Named HTML templates, parsed once at import and rendered with escaped values."""
+
+    def __init__(self):
+        self._templates = {}
+
+    def register(self, template_name: str, source: str):
+        self._templates[template_name] = Template(source)
+
+    def render(self, template_name: str, /, **values) -> str:
+        escaped = {
+            key: value if isinstance(value, SafeHTML) else html.escape(str(value))
+            for key, value in values.items()
+        }
+        return self._templates[template_name].substitute(escaped)
+
+
+templates = TemplateRegistry()
+
+# Shared by the PDF and the email so both always describe the payment the same way
+templates.register("invoice_details", """
+    <p><strong>Session ID:</strong> $session_id</p>
+    <p><strong>Amount Paid:</strong> $amount USD</p>
+""")
+
+templates.register("invoice_pdf", """
+<html>
+    <body>
+        <h2>Invoice</h2>
+        $details
+    </body>
+</html>
+""")
+
+templates.register("invoice_email", """
+    <h3>Thank you for your payment!</h3>
+    $details
+""")
+
+
+def render_invoice(name: str, session_id: str, amount: float) -> str:
+    details = SafeHTML(templates.render("invoice_details", session_id=session_id, amount=amount))
+    return templates.render(name, details=details)
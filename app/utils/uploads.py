@@ -0,0 +1,239 @@
+import hashlib
+import os
+import re
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Optional
+from uuid import uuid4
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+from app.models.stored_image import StoredImage
+
+# Upload dir
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_DIR = os.path.join(os.path.dirname(BASE_DIR), "uploads")
+
+UPLOAD_URL_PREFIX = "/uploads/"
+_STORED_PATH = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+def ensure_upload_dir():
+    """Create UPLOAD_DIR; run from the app lifespan rather than at import."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+@dataclass
+class StagedUpload:
+    """A fully received upload sitting in UPLOAD_DIR under a temporary name."""
+    part_path: str
+    sha256: str
+    size: int
+    ext: str
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"Image exceeds the {UPLOAD_MAX_BYTES} byte limit")
+
+
+def _reserve(image: UploadFile):
+    if image.size is not None and image.size > UPLOAD_MAX_BYTES:
+        raise _too_large()
+    ext = os.path.splitext(image.filename or "")[1].lower()
+    # Same filesystem as the shards so placing the file is an atomic rename
+    return os.path.join(UPLOAD_DIR, f".{uuid4().hex}.part"), ext if _EXTENSION.match(ext) else ""
+
+
+def _discard(path: str):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _verify_image(path: str):
+    """Reject files Pillow cannot identify as an image.
+
+    Only the header and structure are checked; decoding the pixels is left
+    to the derivative job, off the request path.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        raise HTTPException(status_code=415, detail="Upload is not a supported image")
+
+
+async def stage_upload(image: UploadFile) -> StagedUpload:
+    """Stream ``image`` to a temporary file, hashing it on the way.
+
+    At most one UPLOAD_CHUNK_SIZE chunk is held in memory and the size limit
+    is enforced while copying. Files that are not images are rejected with 415.
+    """
+    part_path, ext = _reserve(image)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        async with await anyio.open_file(part_path, "wb") as out:
+            while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > UPLOAD_MAX_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                await out.write(chunk)
+        await anyio.to_thread.run_sync(_verify_image, part_path)
+    except BaseException:
+        _discard(part_path)
+        raise
+    return StagedUpload(part_path, digest.hexdigest(), written, ext)
+
+
+def stage_upload_sync(image: UploadFile) -> StagedUpload:
+    """Blocking twin of ``stage_upload`` for routes already running in the threadpool."""
+    part_path, ext = _reserve(image)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(part_path, "wb") as out:
+            while chunk := image.file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > UPLOAD_MAX_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+        _verify_image(part_path)
+    except BaseException:
+        _discard(part_path)
+        raise
+    return StagedUpload(part_path, digest.hexdigest(), written, ext)
+
+
+# Content-addressed store: files live at <sha[:2]>/<sha[2:4]>/<sha><ext> and
+# stored_images counts how many products point at each one. Both helpers
+# run inside the caller's transaction; the first write takes SQLite's write
+# lock, so acquiring and releasing the same digest cannot interleave. The
+# filesystem follows the transaction: files are placed and deleted once it
+# commits, while a rollback, or closing the session without committing,
+# only throws the staged upload away.
+
+_FILE_OPS = "staged_upload_ops"
+
+
+def _stage(db: Session, op):
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_FILE_OPS, []).append(op)
+
+
+def _place(part_path: str, path: str):
+    final_path = os.path.join(UPLOAD_DIR, path)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    # Replacing an existing copy is harmless (same digest, same bytes) and
+    # restores the file if a release of the same digest committed just before
+    os.replace(part_path, final_path)
+
+
+def _remove(bind, path: str):
+    """Delete a released file and its derivatives, unless the digest was stored again since.
+
+    A transaction storing the same bytes can commit right after ours and
+    place its copy before this runs. So the files are moved aside first and
+    the row checked afterwards: a store committed by then gets them back,
+    and one committing later places its own copy after the check.
+    """
+    sha = _STORED_PATH.match(path).group(1)
+    shard_dir = os.path.join(UPLOAD_DIR, os.path.dirname(path))
+    try:
+        names = [name for name in os.listdir(shard_dir) if name.startswith(f"{sha}_") and name.endswith(".webp")]
+    except FileNotFoundError:
+        return
+    moved = []
+    for name in [os.path.basename(path), *names]:
+        target = os.path.join(shard_dir, name)
+        aside = f"{target}.{uuid4().hex}.removed"
+        with suppress(FileNotFoundError):
+            os.rename(target, aside)
+            moved.append((aside, target))
+    with bind.connect() as conn:
+        stored_again = conn.execute(select(StoredImage.sha256).where(StoredImage.sha256 == sha)).first() is not None
+    for aside, target in moved:
+        if stored_again:
+            os.replace(aside, target)
+        else:
+            _discard(aside)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_file_ops(session):
+    for kind, *args in session.info.pop(_FILE_OPS, ()):
+        if kind == "place":
+            _place(*args)
+        else:
+            _remove(session.get_bind(), *args)
+
+
+# Runs after _apply_file_ops on commit, and alone on rollback or close
+@event.listens_for(Session, "after_transaction_end")
+def _discard_file_ops(session, transaction):
+    if transaction.parent is None:
+        for kind, *args in session.info.pop(_FILE_OPS, ()):
+            if kind == "place":
+                _discard(args[0])
+
+
+def store_upload(db: Session, staged: StagedUpload) -> str:
+    """Take one reference on the staged content and return its public URL."""
+    sha = staged.sha256
+    stmt = insert(StoredImage).values(
+        sha256=sha,
+        path=f"{sha[:2]}/{sha[2:4]}/{sha}{staged.ext}",
+        size=staged.size,
+        ref_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StoredImage.sha256],
+        set_={"ref_count": StoredImage.ref_count + 1},
+    ).returning(StoredImage.path)
+    path = db.execute(stmt).scalar_one()
+    _stage(db, ("place", staged.part_path, path))
+    return UPLOAD_URL_PREFIX + path
+
+
+def stored_path(url: str) -> Optional[str]:
+    """Path of a content-addressed upload relative to UPLOAD_DIR, or None for any other URL."""
+    if not url or not url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    path = url[len(UPLOAD_URL_PREFIX):]
+    return path if _STORED_PATH.match(path) else None
+
+
+def derivative_path(path: str, name: str) -> str:
+    """Where the ``name`` derivative of the stored file at ``path`` lives."""
+    sha = _STORED_PATH.match(path).group(1)
+    return f"{os.path.dirname(path)}/{sha}_{name}.webp"
+
+
+def release_upload(db: Session, url: str):
+    """Drop one reference taken by ``store_upload``, deleting the file with the last one on commit.
+
+    URLs outside the store (uploads from before it existed) are left alone.
+    """
+    path = stored_path(url)
+    if path is None:
+        return
+    sha = _STORED_PATH.match(path).group(1)
+    remaining = db.execute(
+        update(StoredImage)
+        .where(StoredImage.sha256 == sha)
+        .values(ref_count=StoredImage.ref_count - 1)
+        .returning(StoredImage.ref_count, StoredImage.path)
+    ).first()
+    if remaining is None or remaining.ref_count > 0:
+        return
+    db.execute(delete(StoredImage).where(StoredImage.sha256 == sha, StoredImage.ref_count <= 0))
+    _stage(db, ("remove", remaining.path))
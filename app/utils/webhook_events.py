@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import PROCESSED_EVENT_RETENTION, RECENT_EVENT_IDS
+from app.models.processed_event import ProcessedEvent
+
+
+class ProcessedEventStore:
+    """Recognizes Stripe events that were already handled.
+
+    The unique index on processed_events.event_id is the source of truth;
+    the bounded in-memory set of recent ids only lets this worker answer
+    the common case (a redelivery seconds later) without a query.
+    """
+
+    def __init__(self, maxsize: int, retention: float = PROCESSED_EVENT_RETENTION):
+        self.maxsize = maxsize
+        self.retention = retention
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.duplicates_suppressed = 0
+        self.pruned = 0
+
+    def seen_recently(self, event_id: str) -> bool:
+        with self._lock:
+            if event_id in self._recent:
+                self._recent.move_to_end(event_id)
+                self.duplicates_suppressed += 1
+                return True
+            return False
+
+    def remember(self, event_id: str):
+        with self._lock:
+            self._recent[event_id] = None
+            self._recent.move_to_end(event_id)
+            while len(self._recent) > self.maxsize:
+                self._recent.popitem(last=False)
+
+    def commit_once(self, db: Session, event_id: str, event_type: str) -> bool:
+        """Record the event with whatever else the caller staged on ``db`` and commit.
+
+        Returns False, rolling everything back, when another delivery of the
+        same event got there first.
+        """
+        db.add(ProcessedEvent(event_id=event_id, event_type=event_type, processed_at=time.time()))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            with self._lock:
+                self.duplicates_suppressed += 1
+            self.remember(event_id)
+            return False
+        self.remember(event_id)
+        return True
+
+    def prune(self, session_factory=None) -> int:
+        """Delete rows older than ``retention``, which Stripe will not redeliver any more.
+
+        Called from idle job workers; does the work at most once per
+        ``retention / 10`` in this process and returns how many rows went.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_prune < self.retention / 10:
+                return 0
+            self._last_prune = now
+        with (session_factory or database.sessionlocal)() as db:
+            deleted = db.execute(delete(ProcessedEvent).where(ProcessedEvent.processed_at < now - self.retention)).rowcount
+            db.commit()
+        with self._lock:
+            self.pruned += deleted
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"recent": len(self._recent), "duplicates_suppressed": self.duplicates_suppressed, "pruned": self.pruned}
+
+
+processed_events = ProcessedEventStore(RECENT_EVENT_IDS)
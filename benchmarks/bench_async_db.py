@@ -0,0 +1,112 @@
+"""Sync vs async router throughput under concurrent load.
+
+Seeds a throwaway SQLite file, mounts the threadpool routers and the
+AsyncSession routers on two in-process apps and fires the same
+authenticated GET requests at both.
+
+    python -m benchmarks.bench_async_db --requests 2000 --concurrency 200
+
+Both engines get a pool as large as the concurrency level: with the default
+5 + 10 QueuePool the sync routers deadlock once every threadpool slot is
+waiting for a connection that can only be returned by another slot.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth.hashing import Hasher
+from app.database import Base, get_async_db, get_async_read_db, get_db, get_read_db
+from app.routers import product, product_async, user, user_async
+from app.utils.jwt import create_access_token
+from benchmarks.common import run_load
+
+
+def seed(db_path: str, products: int):
+    engine = create_engine("sqlite:///" + db_path)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{
+            "first_name": "Bench",
+            "last_name": "User",
+            "email": "bench@example.com",
+            "password": Hasher.get_password_hash("benchpass"),
+            "user_type": "normal",
+        }])
+        conn.execute(insert(models.Product), [
+            {"name": f"Product {i}", "description": "benchmark", "price": float(i), "image": None}
+            for i in range(products)
+        ])
+    engine.dispose()
+
+
+def build_sync_app(db_path: str, pool_size: int) -> FastAPI:
+    engine = create_engine("sqlite:///" + db_path, connect_args={"check_same_thread": False}, pool_size=pool_size)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.include_router(product.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    return app
+
+
+def build_async_app(db_path: str, pool_size: int) -> FastAPI:
+    engine = create_async_engine("sqlite+aiosqlite:///" + db_path, pool_size=pool_size)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(user_async.router)
+    app.include_router(product_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    return app
+
+
+async def drive(app: FastAPI, path: str, headers: dict, requests: int, concurrency: int) -> dict:
+    return await run_load(app, lambda client: client.get(path, headers=headers), requests, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--path", default="/products/1")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.products)
+        token = create_access_token({"sub": "bench@example.com", "user_type": "normal"})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        print(f"{args.requests} x GET {args.path} at concurrency {args.concurrency}")
+        for label, app in (
+            ("sync", build_sync_app(db_path, args.concurrency)),
+            ("async", build_async_app(db_path, args.concurrency)),
+        ):
+            result = asyncio.run(drive(app, args.path, headers, args.requests, args.concurrency))
+            print(f"{label:>6}: {result['req_per_s']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
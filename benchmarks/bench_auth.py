@@ -0,0 +1,84 @@
+"""Per-request cost of bearer-token authentication, with and without the token cache.
+
+    python -m benchmarks.bench_auth --requests 5000 --concurrency 16 --users 100
+
+First times TokenService.decode directly (full HS256 verification versus a
+cache hit), then serves a route guarded by get_current_user in-process,
+with the principal cache warm so no SQL runs, next to an unauthenticated
+route. The difference in time per request is the auth overhead.
+"""
+import argparse
+import asyncio
+import timeit
+
+from fastapi import Depends, FastAPI
+
+from app.auth import tokens
+from app.auth.cache import Principal, principal_cache
+from app.auth.deps import get_current_user
+from app.auth.tokens import TokenService
+from app.database import get_read_db
+from benchmarks.common import run_load
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/open")
+    def open_route():
+        return {"ok": True}
+
+    @app.get("/me")
+    def me(current_user=Depends(get_current_user)):
+        return {"ok": True}
+
+    # Principals come from the warm cache, so the session is never used
+    app.dependency_overrides[get_read_db] = lambda: None
+    return app
+
+
+def decode_cost(service: TokenService, token: str, number: int = 20000) -> float:
+    service.decode(token)
+    return timeit.timeit(lambda: service.decode(token), number=number) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=100, help="distinct bearer tokens in rotation")
+    args = parser.parse_args()
+
+    cached = TokenService(cache_size=max(args.users, 1))
+    uncached = TokenService(cache_size=0)
+    token = cached.create_access_token({"sub": "bench0@example.com", "user_type": "normal"})
+    print(f"decode: {decode_cost(uncached, token):6.1f} us verified  {decode_cost(cached, token):6.1f} us cached")
+
+    emails = [f"bench{i}@example.com" for i in range(args.users)]
+    headers = [{"Authorization": f"Bearer {cached.create_access_token({'sub': email, 'user_type': 'normal'})}"} for email in emails]
+    for n, email in enumerate(emails):
+        principal_cache.set(email, Principal(id=n + 1, first_name="Bench", last_name=str(n), email=email, user_type="normal"))
+
+    app = build_app()
+    counter = iter(range(10**9))
+
+    def run(path: str) -> dict:
+        def send(client):
+            return client.get(path, headers=headers[next(counter) % len(headers)])
+        return asyncio.run(run_load(app, send, args.requests, args.concurrency))
+
+    print(f"{args.requests} requests at concurrency {args.concurrency}, {args.users} tokens")
+    baseline = run("/open")
+    print(f"{'no auth':>13}: {baseline['req_per_s']:8.1f} req/s  p50 {baseline['p50_ms']:6.2f} ms  p99 {baseline['p99_ms']:6.2f} ms")
+    for label, service in (("verify always", uncached), ("token cache", cached)):
+        tokens.token_service = service
+        result = run("/me")
+        overhead = (1 / result["req_per_s"] - 1 / baseline["req_per_s"]) * 1e6
+        print(
+            f"{label:>13}: {result['req_per_s']:8.1f} req/s  p50 {result['p50_ms']:6.2f} ms  "
+            f"p99 {result['p99_ms']:6.2f} ms  auth {overhead:7.1f} us/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
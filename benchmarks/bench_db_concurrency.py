@@ -0,0 +1,132 @@
+"""Mixed read/write load against SQLite, default engine vs tuned engines.
+
+    python -m benchmarks.bench_db_concurrency --readers 16 --writers 4 --seconds 5
+
+Reader threads page through the catalog with the keyset list query while
+writer threads read a product, update its price and insert a new one in a
+single transaction. The "default" configuration is the engine the app used
+to build (rollback journal, one shared pool, no pragmas); "tuned" uses
+app.database.make_engine for the writers and a separate query_only pool for
+the readers, with WAL and the configured pragmas. Each configuration runs
+on its own freshly seeded file, since WAL mode persists in the database.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.crud.product import products_page_query
+from app.database import Base, make_engine
+from app.models.product import Product
+from benchmarks.common import percentile
+
+
+def seed(url: str, rows: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [
+            {"name": f"Product {i}", "description": "benchmark", "price": float(i % 500), "image": None}
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def default_engines(url: str, pool_size: int):
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=pool_size)
+    return engine, engine
+
+
+def tuned_engines(url: str, pool_size: int):
+    return make_engine(url, pool_size=pool_size), make_engine(url, read_only=True, pool_size=pool_size)
+
+
+def reader(engine, stop, stats, rng):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as db:
+                stmt = products_page_query(limit=50, sort="price", min_price=rng.uniform(0, 450))
+                db.scalars(stmt).all()
+        except OperationalError:
+            stats["read_errors"] += 1
+            continue
+        stats["reads"].append(time.perf_counter() - start)
+
+
+def writer(engine, stop, stats, rng, rows):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as db:
+                product_id = rng.randint(1, rows)
+                price = db.scalar(select(Product.price).where(Product.id == product_id))
+                db.execute(update(Product).where(Product.id == product_id).values(price=(price or 0) + 1))
+                db.add(Product(name="Added", description="benchmark", price=rng.uniform(0, 500)))
+                db.commit()
+        except OperationalError:
+            stats["write_errors"] += 1
+            continue
+        stats["writes"].append(time.perf_counter() - start)
+
+
+def run(build, url: str, args) -> dict:
+    write_engine, read_engine = build(url, args.readers + args.writers)
+    stop = threading.Event()
+    stats = {"reads": [], "writes": [], "read_errors": 0, "write_errors": 0}
+    threads = [
+        threading.Thread(target=reader, args=(read_engine, stop, stats, random.Random(i)))
+        for i in range(args.readers)
+    ] + [
+        threading.Thread(target=writer, args=(write_engine, stop, stats, random.Random(1000 + i), args.rows))
+        for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    reads, writes = sorted(stats["reads"]), sorted(stats["writes"])
+    return {
+        "reads_per_s": len(reads) / args.seconds,
+        "writes_per_s": len(writes) / args.seconds,
+        "read_p95_ms": percentile(reads, 0.95) * 1000,
+        "write_p95_ms": percentile(writes, 0.95) * 1000,
+        "read_errors": stats["read_errors"],
+        "write_errors": stats["write_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + {args.writers} writers for {args.seconds:g}s over {args.rows} products")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, build in (("default", default_engines), ("tuned", tuned_engines)):
+            url = "sqlite:///" + os.path.join(tmp, f"{label}.db")
+            seed(url, args.rows)
+            result = run(build, url, args)
+            print(
+                f"{label:>8}: reads {result['reads_per_s']:8.1f}/s  p95 {result['read_p95_ms']:7.2f} ms  "
+                f"writes {result['writes_per_s']:7.1f}/s  p95 {result['write_p95_ms']:7.2f} ms  "
+                f"locked {result['read_errors'] + result['write_errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
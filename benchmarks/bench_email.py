@@ -0,0 +1,72 @@
+"""Email throughput against the local fake SendGrid server.
+
+    python -m benchmarks.bench_email --messages 500 --latency 0.02
+
+Compares a fresh connection per message (the old SDK behaviour) with
+EmailDelivery sending each message straight over its pool, and with its
+batching queue, for both distinct messages and a broadcast where every
+message shares the same content.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.utils.email import EmailDelivery, OutgoingEmail, _payload
+from benchmarks.fake_sendgrid import FakeSendGrid
+
+
+def unpooled(url, messages, concurrency):
+    def send(message):
+        with httpx.Client(base_url=url) as client:
+            client.post("/v3/mail/send", json=_payload("bench@example.com", [message])).raise_for_status()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, messages))
+
+
+def pooled(url, messages, concurrency):
+    delivery = EmailDelivery(api_url=url, api_key="bench", from_email="bench@example.com")
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(delivery.send, messages))
+    finally:
+        delivery.close()
+
+
+def batched(url, messages, concurrency):
+    delivery = EmailDelivery(api_url=url, api_key="bench", from_email="bench@example.com")
+    try:
+        for future in [delivery.submit(message) for message in messages]:
+            future.result()
+    finally:
+        delivery.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated SendGrid latency in seconds")
+    args = parser.parse_args()
+
+    distinct = [OutgoingEmail(f"user{i}@example.com", "Invoice", f"<p>invoice {i}</p>") for i in range(args.messages)]
+    broadcast = [OutgoingEmail(f"user{i}@example.com", "News", "<p>same for everyone</p>") for i in range(args.messages)]
+
+    print(f"{args.messages} messages, {args.concurrency} senders, {args.latency * 1000:.0f} ms simulated latency")
+    for label, sender in (("unpooled", unpooled), ("pooled", pooled), ("batched", batched)):
+        for kind, messages in (("distinct", distinct), ("broadcast", broadcast)):
+            server = FakeSendGrid(latency=args.latency).start()
+            start = time.perf_counter()
+            sender(server.url, messages, args.concurrency)
+            elapsed = time.perf_counter() - start
+            server.shutdown()
+            print(
+                f"{label:>8} {kind:>9}: {len(messages) / elapsed:8.1f} msg/s  "
+                f"{server.calls:5d} API calls  {len(server.connections):4d} connections"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cold-start cost of importing the app, from ``python -X importtime``.
+
+    python -m benchmarks.bench_importtime --runs 5 --rev HEAD~1
+
+Every run is a fresh interpreter importing app.main. Reports the median
+cumulative import time of app.main, the median wall time of the whole
+process, and the heaviest modules of the last run. With ``--rev`` the app
+package of that git revision is extracted to a temporary directory and
+measured first, so the two lines read as before and after.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+TARGET = "app.main"
+
+
+def parse_importtime(stderr: str):
+    """(cumulative microseconds, depth, module) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2, name.strip()))
+    return rows
+
+
+def measure(cwd: str, runs: int) -> dict:
+    env = {**os.environ, "PYTHONPATH": cwd}
+    imports, walls, rows = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        )
+        walls.append(time.perf_counter() - start)
+        rows = parse_importtime(proc.stderr)
+        imports.append(next(cumulative for cumulative, _, name in rows if name == TARGET))
+    return {
+        "import_ms": statistics.median(imports) / 1000,
+        "process_ms": statistics.median(walls) * 1000,
+        "heaviest": sorted((row for row in rows if row[1] <= 1 and row[2] != TARGET), reverse=True),
+    }
+
+
+def extract(rev: str, dest: str):
+    archive = subprocess.run(["git", "archive", "--format=tar", rev, "app"], capture_output=True, check=True).stdout
+    path = os.path.join(dest, "app.tar")
+    with open(path, "wb") as f:
+        f.write(archive)
+    with tarfile.open(path) as tar:
+        tar.extractall(dest)
+
+
+def report(label: str, result: dict, top: int):
+    print(f"{label:>12}: import {TARGET} {result['import_ms']:7.1f} ms   process {result['process_ms']:7.1f} ms")
+    for cumulative, _, name in result["heaviest"][:top]:
+        print(f"{'':>14}{cumulative / 1000:7.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rev", help="git revision to measure first, for a before/after comparison")
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to list")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if args.rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            extract(args.rev, tmp)
+            report(args.rev, measure(tmp, args.runs), args.top)
+    report("working tree", measure(root, args.runs), args.top)
+
+
+if __name__ == "__main__":
+    main()
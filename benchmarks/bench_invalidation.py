@@ -0,0 +1,97 @@
+"""How quickly other workers see a cache invalidation, and what idle polling costs.
+
+    python -m benchmarks.bench_invalidation --workers 4 --changes 200 --interval 0.5
+
+Starts ``--workers`` processes, each with its own InvalidationBus polling a
+shared SQLite file, then commits ``--changes`` invalidations from the
+parent at random moments. Every worker reports when it applied each one;
+the delay from commit to apply should stay under the poll interval. The
+idle cost is one poll that finds nothing new, which is a single
+``PRAGMA data_version`` on SQLite.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import timeit
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_engine
+from app.utils.invalidation import InvalidationBus
+from benchmarks.common import percentile
+
+
+def make_bus(url: str, interval: float) -> InvalidationBus:
+    return InvalidationBus(
+        enabled=True,
+        poll_interval=interval,
+        engine=make_engine(url, read_only=True),
+        session_factory=sessionmaker(bind=make_engine(url)),
+    )
+
+
+def worker(url: str, interval: float, applied, ready, done):
+    bus = make_bus(url, interval)
+    # The key carries the publisher's commit time
+    bus.subscribe("bench", lambda key, change_id: key and applied.put(time.time() - float(key)))
+    bus.start()
+    ready.put(os.getpid())
+    done.wait()
+    bus.stop()
+
+
+def idle_poll_cost(url: str, number: int = 20000) -> float:
+    bus = make_bus(url, 0)
+    with bus.engine.connect() as conn:
+        bus.poll(conn)
+        bus.poll(conn)
+        return timeit.timeit(lambda: bus.poll(conn), number=number) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.5, help="poll interval in seconds")
+    parser.add_argument("--spacing", type=float, default=0.02, help="mean seconds between published changes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = "sqlite:///" + os.path.join(tmp, "bench.db")
+        Base.metadata.create_all(make_engine(url))
+        print(f"idle poll: {idle_poll_cost(url):6.1f} us")
+
+        ctx = multiprocessing.get_context("spawn")
+        applied, ready, done = ctx.Queue(), ctx.Queue(), ctx.Event()
+        procs = [ctx.Process(target=worker, args=(url, args.interval, applied, ready, done)) for _ in range(args.workers)]
+        for proc in procs:
+            proc.start()
+        for _ in procs:
+            ready.get()
+        time.sleep(args.interval * 2)
+
+        publisher = make_bus(url, args.interval)
+        session_factory = publisher.session_factory
+        for _ in range(args.changes):
+            with session_factory() as db:
+                publisher.publish(db, "bench", repr(time.time()))
+                db.commit()
+            time.sleep(random.expovariate(1 / args.spacing))
+
+        delays = sorted(applied.get(timeout=args.interval * 10 + 10) for _ in range(args.changes * args.workers))
+        done.set()
+        for proc in procs:
+            proc.join()
+
+    print(
+        f"{args.workers} workers, {args.changes} changes, poll every {args.interval * 1000:.0f} ms: "
+        f"p50 {percentile(delays, 0.50) * 1000:6.1f} ms  p99 {percentile(delays, 0.99) * 1000:6.1f} ms  "
+        f"max {delays[-1] * 1000:6.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Invoice PDF rendering throughput, inline versus the PDF process pool.
+
+    python -m benchmarks.bench_invoices --invoices 200 --pools 0,2,4
+"""
+import argparse
+import os
+import time
+
+from app.utils import pdf_generator
+from app.utils.pools import shutdown_pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=200)
+    parser.add_argument("--pools", default=f"0,{os.cpu_count() or 1}", help="comma-separated PDF_POOL_WORKERS values")
+    args = parser.parse_args()
+
+    batch = [(f"cs_bench_{i}", 10.0 + i) for i in range(args.invoices)]
+    print(f"{args.invoices} invoices per run on {os.cpu_count()} cores")
+    for workers in (int(n) for n in args.pools.split(",")):
+        shutdown_pools()
+        pdf_generator.PDF_POOL_WORKERS = workers
+        # Start the pool and import xhtml2pdf in every worker before timing
+        pdf_generator.render_invoices(batch[:max(workers, 1)])
+
+        start = time.perf_counter()
+        pdfs = pdf_generator.render_invoices(batch)
+        elapsed = time.perf_counter() - start
+
+        cores = max(workers, 1)
+        rate = len(pdfs) / elapsed
+        print(f"pool {workers:>3}: {rate:8.1f} invoices/s  {rate / cores:8.1f} invoices/s per core")
+    shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Login throughput for different hashing pool sizes.
+
+Every login runs one bcrypt verification at the configured BCRYPT_ROUNDS.
+Use the results to size HASH_POOL_WORKERS: throughput should scale with the
+pool until it reaches the number of cores, while 0 (hashing on the request
+thread) stays flat no matter the concurrency.
+
+    python -m benchmarks.bench_login --pools 0,1,2,4 --requests 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth import hashing
+from app.database import Base, get_db, get_read_db
+from app.routers import user
+from app.utils.pools import shutdown_pools
+from benchmarks.common import run_load
+
+USERS = 100
+
+
+def build_app(db_path: str) -> FastAPI:
+    engine = create_engine("sqlite:///" + db_path, connect_args={"check_same_thread": False}, pool_size=64)
+    Base.metadata.create_all(bind=engine)
+    hashed = hashing.Hasher.get_password_hash("benchpass")
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"first_name": "Bench", "last_name": str(i), "email": f"bench{i}@example.com", "password": hashed, "user_type": "normal"}
+            for i in range(USERS)
+        ])
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", default=f"0,{os.cpu_count() or 1}", help="comma-separated HASH_POOL_WORKERS values")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    counter = iter(range(10**9))
+
+    def send(client):
+        n = next(counter) % USERS
+        return client.post("/login", json={"email": f"bench{n}@example.com", "password": "benchpass"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        print(f"{args.requests} logins at concurrency {args.concurrency}, bcrypt cost {hashing.BCRYPT_ROUNDS}")
+        for workers in (int(n) for n in args.pools.split(",")):
+            shutdown_pools()
+            hashing.HASH_POOL_WORKERS = workers
+            result = asyncio.run(run_load(app, send, args.requests, args.concurrency))
+            print(f"pool {workers:>3}: {result['req_per_s']:7.1f} logins/s  p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms")
+        shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
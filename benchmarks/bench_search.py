@@ -0,0 +1,102 @@
+"""Full-text search latency over a seeded catalog.
+
+    python -m benchmarks.bench_search --rows 1000000
+
+Seeds a throwaway SQLite database through the ORM metadata (so the FTS5
+table and triggers are created exactly as in the app), then times the
+first results page for selective, common and prefix queries, ranking every
+match versus only the newest ``--candidates`` (the SEARCH_MAX_CANDIDATES
+window).
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.crud.product import fts_match_expression, search_products_page
+from app.database import Base
+from app.models.product import Product
+from benchmarks.common import percentile
+
+SYLLABLES = "ka lo mi ne ru sa to vi ze po la ri".split()
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(engine, rows: int, batch: int = 20000, vocab_size: int = 20000):
+    """Insert ``rows`` products whose words follow a Zipf-like distribution, as catalog text does."""
+    rng = random.Random(0)
+    words = vocabulary(vocab_size, rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(Product), [
+                {
+                    "name": " ".join(rng.choices(words, cum_weights=cum_weights, k=3)),
+                    "description": " ".join(rng.choices(words, cum_weights=cum_weights, k=12)),
+                    "price": rng.randint(1, 500),
+                }
+                for _ in range(start, min(start + batch, rows))
+            ])
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    engine = create_engine("sqlite:///" + path)
+    if args.keep:
+        print(f"database: {path}")
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    words = seed(engine, args.rows)
+    print(f"seeded {args.rows} products in {time.perf_counter() - start:.1f}s")
+
+    # words[0] is the most frequent word, so it is the worst case for ranking
+    queries = {
+        "selective": words[5000],
+        "two words": f"{words[40]} {words[200][:3]}",
+        "common": words[50],
+        "broadest": words[0],
+        "prefix": words[300][:3],
+    }
+    with Session(engine) as db:
+        for label, q in queries.items():
+            match = fts_match_expression(q)
+            matches = db.scalar(text("SELECT count(*) FROM products_fts WHERE products_fts MATCH :m"), {"m": match})
+            for candidates in (0, args.candidates):
+                timings = []
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    search_products_page(db, match, args.limit, max_candidates=candidates)
+                    timings.append((time.perf_counter() - t) * 1000)
+                timings.sort()
+                window = f"newest {candidates}" if candidates else "all matches"
+                print(
+                    f"{label:>9} {q!r:>12} {matches:>8} matches, ranking {window:>12}: "
+                    f"p50 {percentile(timings, 0.5):8.2f} ms  p95 {percentile(timings, 0.95):8.2f} ms"
+                )
+    engine.dispose()
+    if not args.keep:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
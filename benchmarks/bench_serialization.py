@@ -0,0 +1,110 @@
+"""Rows/second of the list endpoints with and without the FAST_JSON path.
+
+    python -m benchmarks.bench_serialization --users 20000 --products 20000
+
+Seeds a throwaway SQLite file and calls GET / (every user) and
+GET /products/?limit=200 (paging through the whole catalog) on the sync
+routers, first through response_model validation and stdlib json, then
+through column rows rendered by orjson. Auth is overridden so only
+querying and serialization are measured.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+import orjson
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth.deps import allow_admin, get_current_user
+from app.database import Base, get_db, get_read_db
+from app.routers import product, user
+
+
+def seed(db_path: str, users: int, products: int):
+    engine = create_engine("sqlite:///" + db_path)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"first_name": "Bench", "last_name": f"User {i}", "email": f"user{i}@example.com",
+             "password": "x", "user_type": "normal"}
+            for i in range(users)
+        ])
+        conn.execute(insert(models.Product), [
+            {"name": f"Product {i}", "description": "A product used for benchmarking", "price": i + 0.99,
+             "image": f"/uploads/{i % 256:02x}/00/{i:064x}.jpg"}
+            for i in range(products)
+        ])
+    engine.dispose()
+
+
+def build_app(db_path: str) -> FastAPI:
+    engine = create_engine("sqlite:///" + db_path, connect_args={"check_same_thread": False})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.include_router(product.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[allow_admin] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: None
+    return app
+
+
+# Responses are decoded with orjson on both paths, so client-side parsing stays out of the comparison
+async def fetch_users(client) -> int:
+    return len(orjson.loads((await client.get("/")).content))
+
+
+async def fetch_products(client) -> int:
+    rows, url = 0, "/products/?limit=200"
+    while url:
+        page = orjson.loads((await client.get(url)).content)
+        rows += len(page["items"])
+        url = page["next_cursor"] and f"/products/?limit=200&cursor={page['next_cursor']}"
+    return rows
+
+
+async def measure(app, repeat: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, fetch in (("GET /", fetch_users), ("GET /products/", fetch_products)):
+            for fast in (False, True):
+                user.FAST_JSON = product.FAST_JSON = fast
+                await fetch(client)  # warm up
+                start = time.perf_counter()
+                rows = 0
+                for _ in range(repeat):
+                    rows += await fetch(client)
+                rate = rows / (time.perf_counter() - start)
+                print(f"{label:>15} {'orjson rows' if fast else 'response_model':>15}: {rate:10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "serialization.db")
+    seed(db_path, args.users, args.products)
+    asyncio.run(measure(build_app(db_path), args.repeat))
+    os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
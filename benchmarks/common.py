@@ -0,0 +1,45 @@
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_load(app, send, requests: int, concurrency: int, warmup: bool = True) -> dict:
+    """Call ``send(client)`` ``requests`` times, at most ``concurrency`` at once, against an in-process app."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                res = await send(client)
+                latencies.append(time.perf_counter() - start)
+                res.raise_for_status()
+
+        # Warm up connections, pools and the threadpool before measuring
+        if warmup:
+            await asyncio.gather(*(one() for _ in range(min(concurrency, requests))))
+            latencies.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "req_per_s": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
@@ -0,0 +1,84 @@
+"""Minimal stand-in for SendGrid's /v3/mail/send, for offline benchmarks.
+
+    python -m benchmarks.fake_sendgrid --port 8025 --latency 0.02
+    SENDGRID_API_URL=http://127.0.0.1:8025 uvicorn app.main:app
+
+Every accepted call answers 202 like SendGrid does; ``--fail-rate`` answers
+a share of calls with 503 to exercise the retry path.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeSendGrid(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, fail_rate=0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self.personalizations = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client pooling is visible
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if self.path != "/v3/mail/send":
+            return self._reply(404)
+        if random.random() < server.fail_rate:
+            return self._reply(503)
+        payload = json.loads(body)
+        with server._lock:
+            server.calls += 1
+            server.personalizations += len(payload.get("personalizations", []))
+            server.connections.add(self.client_address)
+        self._reply(202)
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeSendGrid(("127.0.0.1", args.port), args.latency, args.fail_rate)
+    print(f"fake SendGrid listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Minimal stand-in for the Stripe endpoints the checkout flow calls, for offline benchmarks.
+
+    python -m benchmarks.fake_stripe --port 12111 --latency 0.05
+
+Point the client at it with ``stripe.api_base = server.url``. Products,
+prices and checkout sessions get fresh ids, except that a repeated
+Idempotency-Key answers with the object created the first time, as Stripe does.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OBJECTS = {
+    "/v1/products": ("product", "prod"),
+    "/v1/prices": ("price", "price"),
+    "/v1/checkout/sessions": ("checkout.session", "cs"),
+}
+
+
+class FakeStripe(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.calls = {path: 0 for path in OBJECTS}
+        self._ids = itertools.count(1)
+        self._idempotent = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def create(self, path: str, idempotency_key: str = None) -> dict:
+        kind, prefix = OBJECTS[path]
+        with self._lock:
+            self.calls[path] += 1
+            if idempotency_key and idempotency_key in self._idempotent:
+                return self._idempotent[idempotency_key]
+            obj = {"id": f"{prefix}_bench{next(self._ids)}", "object": kind}
+            if kind == "checkout.session":
+                obj["url"] = f"https://checkout.stripe.test/{obj['id']}"
+            if idempotency_key:
+                self._idempotent[idempotency_key] = obj
+        return obj
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if self.path not in OBJECTS:
+            return self._reply(404, {"error": {"type": "invalid_request_error", "message": "Unrecognized request URL"}})
+        self._reply(200, server.create(self.path, self.headers.get("Idempotency-Key")))
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = FakeStripe(("127.0.0.1", args.port), args.latency)
+    print(f"fake Stripe listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""Endpoint benchmark suite over seeded catalogs of increasing size.
+
+    python -m benchmarks.suite --sizes 1000,100000,1000000 --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+
+For every size a throwaway SQLite file is seeded with that many products
+(Zipf-distributed text, as in bench_search) and that many users, then each
+scenario drives its endpoint in-process through httpx's ASGITransport at
+the given concurrency. Stripe and SendGrid are replaced by the local
+servers in fake_stripe / fake_sendgrid, so checkout and the webhook's
+invoice job run their real code paths without leaving the machine.
+
+The JSON report holds throughput and p50/p95/p99 latency per size and
+scenario, plus the commit it was measured on; ``--compare`` prints the
+relative change between two reports.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import stripe
+from fastapi import FastAPI
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth.cache import principal_cache
+from app.auth.hashing import Hasher
+from app.database import (
+    Base,
+    get_async_db,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+    make_async_engine,
+    make_engine,
+)
+from app.models.job import Job
+from app.routers import product, product_async, stripe_webhook, user, user_async
+from app.utils import email, pdf_generator
+from app.utils.job_queue import JobWorker
+from app.utils.jwt import create_access_token
+from app.utils.metrics import MetricsMiddleware, instrument_engine
+from app.utils.pools import shutdown_pools
+from benchmarks.bench_search import seed as seed_products
+from benchmarks.common import run_load
+from benchmarks.fake_sendgrid import FakeSendGrid
+from benchmarks.fake_stripe import FakeStripe
+
+PASSWORD = "benchpass"
+ADMIN_EMAIL = "admin@bench.example.com"
+WEBHOOK_SECRET = "whsec_bench"
+
+SCENARIOS = {}
+
+
+def scenario(name: str, max_size: int = None):
+    """Register ``factory(ctx) -> send(client)``; sizes above ``max_size`` skip it."""
+    def register(factory):
+        SCENARIOS[name] = (factory, max_size)
+        return factory
+    return register
+
+
+@scenario("products_list")
+def products_list(ctx):
+    return lambda client: client.get(
+        f"/products/?limit=50&min_price={ctx.rng.randint(1, 500)}", headers=ctx.user_headers
+    )
+
+
+@scenario("product_get")
+def product_get(ctx):
+    return lambda client: client.get(f"/products/{ctx.rng.randint(1, ctx.size)}", headers=ctx.user_headers)
+
+
+@scenario("products_search")
+def products_search(ctx):
+    # The 200 most frequent words: broad queries are the expensive ones
+    return lambda client: client.get(
+        f"/products/search?q={ctx.rng.choice(ctx.words[:200])}", headers=ctx.user_headers
+    )
+
+
+# GET /users/ is not paginated, so every request serialises the whole table
+@scenario("users_list", max_size=10000)
+def users_list(ctx):
+    return lambda client: client.get("/", headers=ctx.admin_headers)
+
+
+@scenario("login")
+def login(ctx):
+    return lambda client: client.post(
+        "/login", json={"email": f"bench{ctx.rng.randint(1, ctx.size)}@example.com", "password": PASSWORD}
+    )
+
+
+@scenario("checkout_session")
+def checkout_session(ctx):
+    return lambda client: client.post(
+        f"/products/checkout-session/{ctx.rng.randint(1, ctx.size)}", headers=ctx.user_headers
+    )
+
+
+@scenario("webhook")
+def webhook(ctx):
+    event_ids = itertools.count(1)
+
+    def send(client):
+        payload, signature = signed_event(f"evt_bench_{ctx.size}_{next(event_ids)}")
+        return client.post("/products/webhook", content=payload, headers={"stripe-signature": signature})
+    return send
+
+
+def signed_event(event_id: str):
+    payload = json.dumps({
+        "id": event_id,
+        "object": "event",
+        "type": "checkout.session.completed",
+        "data": {"object": {
+            "id": f"cs_{event_id}",
+            "amount_total": 1999,
+            "customer_details": {"email": "buyer@example.com"},
+        }},
+    })
+    timestamp = int(time.time())
+    digest = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return payload, f"t={timestamp},v1={digest}"
+
+
+class Context:
+    def __init__(self, size: int, words, seed: int = 0):
+        self.size = size
+        self.words = words
+        self.rng = random.Random(seed)
+        user_token = create_access_token({"sub": "bench1@example.com", "user_type": "normal"})
+        admin_token = create_access_token({"sub": ADMIN_EMAIL, "user_type": "admin"})
+        self.user_headers = {"Authorization": f"Bearer {user_token}"}
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+
+def seed_users(engine, rows: int, batch: int = 20000):
+    # Every user shares one hash: hashing a million passwords would dwarf the benchmark
+    hashed = Hasher.get_password_hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{
+            "first_name": "Admin", "last_name": "Bench", "email": ADMIN_EMAIL, "password": hashed, "user_type": "admin",
+        }])
+        for start in range(1, rows + 1, batch):
+            conn.execute(insert(models.User), [
+                {"first_name": "Bench", "last_name": str(i), "email": f"bench{i}@example.com", "password": hashed, "user_type": "normal"}
+                for i in range(start, min(start + batch, rows + 1))
+            ])
+
+
+def seed(url: str, size: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    words = seed_products(engine, size)
+    seed_users(engine, size)
+    engine.dispose()
+    return words
+
+
+def build_app(url: str, pool_size: int, use_async: bool, with_metrics: bool = False):
+    """In-process app on the seeded file; returns it with the sync session factory for the job workers."""
+    write_engine = make_engine(url, pool_size=pool_size)
+    read_engine = make_engine(url, read_only=True, pool_size=pool_size)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    read_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+    def override(factory):
+        def get():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return get
+
+    app = FastAPI()
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+        instrument_engine(write_engine)
+        instrument_engine(read_engine)
+    app.dependency_overrides[get_db] = override(session_factory)
+    app.dependency_overrides[get_read_db] = override(read_session_factory)
+    if use_async:
+        async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+        def override_async(engine):
+            factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+            async def get():
+                async with factory() as db:
+                    yield db
+            return get
+
+        async_engine = make_async_engine(async_url, pool_size=pool_size)
+        async_read_engine = make_async_engine(async_url, read_only=True, pool_size=pool_size)
+        if with_metrics:
+            instrument_engine(async_engine.sync_engine)
+            instrument_engine(async_read_engine.sync_engine)
+        app.dependency_overrides[get_async_db] = override_async(async_engine)
+        app.dependency_overrides[get_async_read_db] = override_async(async_read_engine)
+        app.include_router(user_async.router)
+        app.include_router(product_async.router)
+    else:
+        app.include_router(user.router)
+        app.include_router(product.router)
+    app.include_router(stripe_webhook.router)
+    return app, session_factory
+
+
+def drain_jobs(session_factory, workers: int, timeout: float) -> dict:
+    """Run the queued invoice jobs on a JobWorker pool and time it."""
+    with session_factory() as db:
+        queued = db.scalar(select(func.count()).select_from(Job))
+    worker = JobWorker(workers, session_factory)
+    start = time.perf_counter()
+    worker.start()
+    remaining = queued
+    while remaining and time.perf_counter() - start < timeout:
+        time.sleep(0.2)
+        with session_factory() as db:
+            remaining = db.scalar(select(func.count()).select_from(Job))
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    done = queued - remaining
+    return {"jobs": queued, "jobs_done": done, "jobs_per_s": done / elapsed if elapsed else 0.0}
+
+
+def run_size(size: int, args, tmp: str, sendgrid: FakeSendGrid) -> dict:
+    url = "sqlite:///" + os.path.join(tmp, f"bench_{size}.db")
+    start = time.perf_counter()
+    words = seed(url, size)
+    log(f"seeded {size} products and users in {time.perf_counter() - start:.1f}s")
+
+    app, session_factory = build_app(url, args.concurrency, args.use_async, args.metrics)
+    ctx = Context(size, words)
+    principal_cache.clear()
+    results = {}
+    for name in args.scenarios:
+        factory, max_size = SCENARIOS[name]
+        if max_size is not None and size > max_size:
+            log(f"  {name:<17} skipped above {max_size} rows")
+            continue
+        result = asyncio.run(run_load(app, factory(ctx), args.requests, args.concurrency))
+        if name == "webhook":
+            calls_before = sendgrid.calls
+            result.update(drain_jobs(session_factory, args.job_workers, args.drain_timeout))
+            result["sendgrid_calls"] = sendgrid.calls - calls_before
+        results[name] = result
+        log(f"  {name:<17} {result['req_per_s']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  "
+            f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before: dict, after: dict):
+    """Print throughput and p95 change for every size/scenario present in both reports."""
+    print(f"{before['meta'].get('commit') or '?'} -> {after['meta'].get('commit') or '?'}")
+    print(f"{'size':>9}  {'scenario':<17} {'req/s':>18} {'change':>8} {'p95 ms':>20} {'change':>8}")
+    for size, scenarios in after["results"].items():
+        for name, new in scenarios.items():
+            old = before["results"].get(size, {}).get(name)
+            if old is None:
+                continue
+            rate = new["req_per_s"] / old["req_per_s"] - 1 if old["req_per_s"] else 0.0
+            p95 = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+            print(
+                f"{size:>9}  {name:<17} {old['req_per_s']:8.1f} -> {new['req_per_s']:7.1f} {rate:+8.1%} "
+                f"{old['p95_ms']:9.2f} -> {new['p95_ms']:8.2f} {p95:+8.1%}"
+            )
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated catalog/user counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the AsyncSession routers")
+    parser.add_argument("--metrics", action="store_true", help="install MetricsMiddleware, to measure its overhead")
+    parser.add_argument("--stripe-latency", type=float, default=0.0, help="seconds added to every fake Stripe call")
+    parser.add_argument("--sendgrid-latency", type=float, default=0.0, help="seconds added to every fake SendGrid call")
+    parser.add_argument("--job-workers", type=int, default=4, help="JobWorker threads draining webhook invoices")
+    parser.add_argument("--drain-timeout", type=float, default=300)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_before, open(args.compare[1]) as f_after:
+            compare(json.load(f_before), json.load(f_after))
+        return
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    stripe_server = FakeStripe(latency=args.stripe_latency).start()
+    sendgrid = FakeSendGrid(latency=args.sendgrid_latency).start()
+    stripe.api_base = stripe_server.url
+    stripe.api_key = "sk_test_bench"
+    stripe_webhook.STRIPE_WEBHOOK_SECRET = WEBHOOK_SECRET
+    email._delivery = email.EmailDelivery(api_url=sendgrid.url, api_key="SG.bench", from_email="bench@example.com")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "async": args.use_async,
+            "metrics": args.metrics,
+        },
+        "results": {},
+    }
+    # The app prints progress of its own; keep stdout for the JSON report
+    try:
+        with contextlib.redirect_stdout(sys.stderr), tempfile.TemporaryDirectory() as tmp:
+            pdf_generator.INVOICES_DIR = os.path.join(tmp, "invoices")
+            for size in sizes:
+                log(f"size {size}")
+                report["results"][str(size)] = run_size(size, args, tmp, sendgrid)
+    finally:
+        email._delivery.close()
+        shutdown_pools()
+        stripe_server.shutdown()
+        sendgrid.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        log(f"report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,11 @@ from sqlalchemy.orm import sessionmaker
 from passlib.hash import bcrypt
 
 from app.main import app
-from app.database import get_db, Base
+from app.auth.cache import principal_cache
+from app.utils.catalog import catalog_version
+from app.utils.invalidation import invalidation_bus
+from app.utils import images, uploads
+from app.database import get_db, get_read_db, Base
 from app.models.user import User, UserTypeEnum
 from app.utils.jwt import create_access_token
 
@@ -18,6 +22,17 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 
 Base.metadata.create_all(bind=engine)
 
+@pytest.fixture(autouse=True)
+def isolated_upload_dir(tmp_path, monkeypatch):
+    """Keep uploaded test images out of the repository's uploads/ directory."""
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.makedirs(uploads.UPLOAD_DIR)
+    # Render image derivatives inline so tests never start the process pool,
+    # and announce them through the test database
+    monkeypatch.setattr(images, "IMAGE_POOL_WORKERS", 0)
+    monkeypatch.setattr(invalidation_bus, "session_factory", TestingSessionLocal)
+    images.rendered_variants.forget(None)
+
 @pytest.fixture(scope="function")
 def db_session():
     Base.metadata.drop_all(bind=engine)
@@ -37,6 +52,9 @@ def client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    principal_cache.clear()
+    catalog_version.reset()
 
     #Fake routes for tests only
 
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.auth.cache import principal_cache
+from app.auth.hashing import Hasher
+from app.database import Base, get_async_db, get_async_read_db
+from app.routers import product_async, user_async
+from app.utils import uploads
+from .test_products import image_bytes
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "test_async.db")
+sync_engine = create_engine("sqlite:///" + DB_PATH)
+# NullPool: TestClient drives each request on its own event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///" + DB_PATH, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@pytest.fixture(scope="function")
+def async_client():
+    Base.metadata.drop_all(bind=sync_engine)
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        db.add(models.User(
+            first_name="Admin",
+            last_name="User",
+            email="admin@example.com",
+            password=Hasher.get_password_hash("adminpass"),
+            user_type="admin"
+        ))
+        db.add(models.Product(name="Bottle", description="Steel bottle", price=9.5, image="/uploads/a.jpg"))
+        db.commit()
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(user_async.router)
+    app.include_router(product_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    principal_cache.clear()
+    yield TestClient(app)
+
+
+def login(client):
+    res = client.post("/login", json={"email": "admin@example.com", "password": "adminpass"})
+    assert res.status_code == 200
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def test_async_get_products(async_client):
+    headers = login(async_client)
+    res = async_client.get("/products/", headers=headers)
+    assert res.status_code == 200
+    assert [p["name"] for p in res.json()["items"]] == ["Bottle"]
+
+    assert async_client.get("/products/999", headers=headers).status_code == 404
+
+
+def test_async_create_and_delete_user(async_client):
+    headers = login(async_client)
+    res = async_client.post("/", headers=headers, json={
+        "first_name": "New",
+        "last_name": "User",
+        "email": "new@example.com",
+        "password": "newpass123",
+        "user_type": "normal"
+    })
+    assert res.status_code == 200
+    user_id = res.json()["id"]
+
+    res = async_client.delete(f"/{user_id}", headers=headers)
+    assert res.status_code == 200
+    assert [u["email"] for u in async_client.get("/", headers=headers).json()] == ["admin@example.com"]
+
+
+def test_async_export_products(async_client):
+    headers = login(async_client)
+    res = async_client.get("/products/export", headers=headers)
+    assert res.status_code == 200
+    assert [json.loads(line)["name"] for line in res.text.splitlines()] == ["Bottle"]
+
+
+def test_async_create_product_upload(async_client):
+    headers = login(async_client)
+    res = async_client.post(
+        "/products/",
+        headers=headers,
+        data={"name": "Lamp", "price": "3"},
+        files={"image": ("lamp.png", image_bytes(), "image/png")}
+    )
+    assert res.status_code == 200
+    stored = os.path.join(uploads.UPLOAD_DIR, res.json()["image"][len("/uploads/"):])
+    with open(stored, "rb") as f:
+        assert f.read() == image_bytes()
+
+    res = async_client.post(
+        "/products/",
+        headers=headers,
+        data={"name": "Lamp", "price": "3"},
+        files={"image": ("lamp.png", b"lamp-bytes", "image/png")}
+    )
+    assert res.status_code == 415
+
+
+def test_async_import_products(async_client):
+    headers = login(async_client)
+    body = "\n".join(json.dumps(row) for row in ({"id": 1, "name": "Bottle", "price": 11}, {"name": "Cup", "price": 2}, {"name": "Bad"}))
+    res = async_client.post("/products/import", headers=headers, files={"file": ("rows.ndjson", body, "application/x-ndjson")})
+    assert res.status_code == 200
+    assert (res.json()["upserted"], res.json()["failed"]) == (2, 1)
+    prices = {p["name"]: p["price"] for p in async_client.get("/products/", headers=headers).json()["items"]}
+    assert prices == {"Bottle": 11, "Cup": 2}
+
+
+def test_async_bulk_create_users(async_client):
+    headers = login(async_client)
+    body = "\n".join(json.dumps({"first_name": "U", "last_name": str(i), "email": email, "password": "pw"})
+                     for i, email in enumerate(["u1@example.com", "admin@example.com"]))
+    res = async_client.post("/bulk", headers=headers, files={"file": ("seats.ndjson", body, "application/x-ndjson")})
+    assert res.status_code == 200
+    assert (res.json()["created"], res.json()["duplicates"]) == (1, 1)
+
+
+def test_async_search_products(async_client):
+    headers = login(async_client)
+    res = async_client.get("/products/search", params={"q": "ste"}, headers=headers)
+    assert res.status_code == 200
+    assert [p["name"] for p in res.json()["items"]] == ["Bottle"]
+
+
+def test_async_conditional_get(async_client):
+    headers = login(async_client)
+    etag = async_client.get("/products/1", headers=headers).headers["etag"]
+    assert async_client.get("/products/1", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_async_fast_json_lists(async_client, monkeypatch):
+    headers = login(async_client)
+    slow = [async_client.get(url, headers=headers).json() for url in ("/", "/products/")]
+    monkeypatch.setattr(user_async, "FAST_JSON", True)
+    monkeypatch.setattr(product_async, "FAST_JSON", True)
+    assert [async_client.get(url, headers=headers).json() for url in ("/", "/products/")] == slow
+
+
+def test_async_requires_token(async_client):
+    assert async_client.get("/products/").status_code == 401
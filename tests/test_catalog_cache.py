@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import models
+from .conftest import engine
+from .test_products import create_admin_and_get_token
+
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_products_conditional_get(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    product = models.Product(name="Bottle", description="Steel", price=9.5)
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+
+    first = client.get("/products/", headers=headers)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    # Auth is served by the principal cache, so a 304 runs no SQL at all
+    with recorded_statements() as statements:
+        for url in ("/products/", f"/products/{product_id}"):
+            res = client.get(url, headers={**headers, "If-None-Match": f"W/{etag}"})
+            assert res.status_code == 304
+            assert res.content == b""
+            assert res.headers["etag"] == etag
+    assert statements == []
+
+
+def test_product_writes_change_the_etag(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    product = models.Product(name="Bottle", description="Steel", price=9.5)
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+
+    etag = client.get(f"/products/{product_id}", headers=headers).headers["etag"]
+    client.put(f"/products/{product_id}", data={"price": "12"}, headers=headers)
+
+    res = client.get(f"/products/{product_id}", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["price"] == 12
+    assert res.headers["etag"] != etag
+
+    client.delete(f"/products/{product_id}", headers=headers)
+    assert client.get("/products/", headers={**headers, "If-None-Match": res.headers["etag"]}).status_code == 200
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import make_async_engine, make_engine
+
+
+def test_engine_applies_sqlite_pragmas(tmp_path):
+    engine = make_engine("sqlite:///" + str(tmp_path / "pragmas.db"))
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 0
+    engine.dispose()
+
+
+def test_read_engine_rejects_writes(tmp_path):
+    url = "sqlite:///" + str(tmp_path / "readonly.db")
+    engine = make_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    read_engine = make_engine(url, read_only=True)
+    with read_engine.connect() as conn:
+        assert conn.execute(text("SELECT x FROM t")).scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+    engine.dispose()
+    read_engine.dispose()
+
+
+def test_async_engine_applies_sqlite_pragmas(tmp_path):
+    async def pragmas():
+        engine = make_async_engine("sqlite+aiosqlite:///" + str(tmp_path / "async.db"), read_only=True)
+        async with engine.connect() as conn:
+            mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            query_only = (await conn.execute(text("PRAGMA query_only"))).scalar()
+        await engine.dispose()
+        return mode, query_only
+
+    assert asyncio.run(pragmas()) == ("wal", 1)
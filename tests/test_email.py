@@ -0,0 +1,64 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from app.utils.email import EmailDelivery, EmailDeliveryError, OutgoingEmail
+
+
+def make_delivery(handler, **kwargs):
+    kwargs.setdefault("batch_window", 0.2)
+    kwargs.setdefault("retry_base", 0)
+    return EmailDelivery(
+        api_url="http://sendgrid.test",
+        api_key="test",
+        from_email="shop@example.com",
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+def test_identical_messages_share_one_call():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(202)
+
+    delivery = make_delivery(handler)
+    futures = [delivery.submit(OutgoingEmail(f"u{i}@example.com", "Hi", "<p>same</p>")) for i in range(5)]
+    futures.append(delivery.submit(OutgoingEmail("other@example.com", "Hi", "<p>different</p>")))
+    for future in futures:
+        future.result(timeout=5)
+    delivery.close()
+
+    assert len(payloads) == 2
+    sizes = sorted(len(p["personalizations"]) for p in payloads)
+    assert sizes == [1, 5]
+
+
+def test_server_errors_are_retried():
+    statuses = iter([503, 429, 202])
+    delivery = make_delivery(lambda request: httpx.Response(next(statuses)))
+    delivery.send(OutgoingEmail("u@example.com", "Hi", "<p>x</p>"))
+    delivery.close()
+    assert delivery.api_calls == 3
+
+
+def test_final_failure_raises():
+    delivery = make_delivery(lambda request: httpx.Response(400, text="bad request"), max_retries=3)
+    with pytest.raises(EmailDeliveryError):
+        delivery.send(OutgoingEmail("u@example.com", "Hi", "<p>x</p>"))
+    delivery.close()
+    assert delivery.api_calls == 1
+
+
+def test_send_skips_the_batch_window():
+    delivery = make_delivery(lambda request: httpx.Response(202), batch_window=5)
+    start = time.monotonic()
+    delivery.send(OutgoingEmail("u@example.com", "Invoice", "<p>only yours</p>"))
+    assert time.monotonic() - start < 1
+    assert (delivery.api_calls, delivery.messages_sent) == (1, 1)
+    delivery.close()
+
@@ -0,0 +1,36 @@
+import csv
+import io
+import json
+
+from app import models
+from .test_products import create_admin_and_get_token
+
+
+def test_export_users_ndjson(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+
+    res = client.get("/export/users", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert rows == [{
+        "id": rows[0]["id"],
+        "first_name": "Admin",
+        "last_name": "User",
+        "email": "admin@example.com",
+        "user_type": "admin",
+    }]
+
+
+def test_export_products_csv(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    for i in range(3):
+        db_session.add(models.Product(name=f"Item, {i}", description="seeded", price=float(i), image=None))
+    db_session.commit()
+
+    res = client.get("/products/export", params={"format": "csv"}, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.headers["content-disposition"] == 'attachment; filename="products.csv"'
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [row["name"] for row in rows] == ["Item, 0", "Item, 1", "Item, 2"]
+    assert rows[2]["price"] == "2.0"
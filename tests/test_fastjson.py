@@ -0,0 +1,27 @@
+from app import models
+from app.routers import product as product_router
+from app.routers import user as user_router
+from .test_products import create_admin_and_get_token
+
+
+def test_fast_json_matches_validated_responses(client, db_session, monkeypatch):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    db_session.add_all([
+        models.Product(name="Bottle", description="Steel", price=9.5, image="/uploads/ab/cd/abcd.jpg"),
+        models.Product(name="Lamp", description=None, price=30, image=None),
+        models.Product(name="Mug", description="Ceramic", price=4.25, image="https://cdn.example.com/mug.png"),
+    ])
+    db_session.commit()
+
+    urls = ("/products/?limit=2", "/products/?limit=2&sort=price&order=desc", "/")
+    slow = [client.get(url, headers=headers) for url in urls]
+    monkeypatch.setattr(product_router, "FAST_JSON", True)
+    monkeypatch.setattr(user_router, "FAST_JSON", True)
+    fast = [client.get(url, headers=headers) for url in urls]
+
+    for before, after in zip(slow, fast):
+        assert after.status_code == 200
+        assert after.headers["content-type"] == "application/json"
+        assert after.json() == before.json()
+    assert fast[0].headers["etag"] == slow[0].headers["etag"]
@@ -0,0 +1,96 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app import models
+from app.utils import images, uploads
+from .test_products import create_admin_and_get_token
+
+
+def png_bytes(size=(640, 320)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_parse_variants():
+    assert images.parse_variants("thumb:200, medium:800,") == {"thumb": 200, "medium": 800}
+
+
+def test_generate_variants_resizes_to_webp(tmp_path):
+    source = tmp_path / "source.png"
+    source.write_bytes(png_bytes())
+    targets = {"thumb": str(tmp_path / "thumb.webp")}
+
+    assert images.generate_variants(str(source), targets, {"thumb": 100}) == [targets["thumb"]]
+    with Image.open(targets["thumb"]) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (100, 50)
+
+    # Already rendered for this content: nothing to do
+    assert images.generate_variants(str(source), targets, {"thumb": 100}) == []
+
+
+def test_generate_variants_rejects_invalid_image(tmp_path):
+    source = tmp_path / "source.jpg"
+    source.write_bytes(b"not an image")
+    with pytest.raises(Exception):
+        images.generate_variants(str(source), {"thumb": str(tmp_path / "t.webp")}, {"thumb": 100})
+
+
+def test_variant_urls_only_list_rendered_files(monkeypatch):
+    monkeypatch.setattr(images, "VARIANTS", {"thumb": 64})
+    sha = "ab" * 32
+    image_url = f"/uploads/ab/ab/{sha}.png"
+    assert images.variant_urls(image_url) == {}
+
+    thumb = os.path.join(uploads.UPLOAD_DIR, "ab", "ab", f"{sha}_thumb.webp")
+    os.makedirs(os.path.dirname(thumb))
+    open(thumb, "wb").close()
+    # Looked up once; the finished job's announcement makes it look again
+    assert images.variant_urls(image_url) == {}
+    images.rendered_variants.forget(f"ab/ab/{sha}.png")
+    assert images.variant_urls(image_url) == {"thumb": f"/uploads/ab/ab/{sha}_thumb.webp"}
+
+
+def test_upload_exposes_variant_urls(client, db_session, monkeypatch):
+    monkeypatch.setattr(images, "VARIANTS", {"thumb": 64})
+    token = create_admin_and_get_token(client, db_session)
+
+    res = client.post(
+        "/products/",
+        headers={"Authorization": f"Bearer {token}"},
+        data={"name": "Poster", "price": "4"},
+        files={"image": ("poster.png", png_bytes(), "image/png")}
+    )
+    assert res.status_code == 200
+    thumb_url = res.json()["variants"]["thumb"]
+    assert thumb_url.endswith("_thumb.webp")
+    assert os.path.exists(os.path.join(uploads.UPLOAD_DIR, thumb_url[len("/uploads/"):]))
+
+    client.delete(f"/products/{res.json()['id']}", headers={"Authorization": f"Bearer {token}"})
+    assert not os.path.exists(os.path.join(uploads.UPLOAD_DIR, thumb_url[len("/uploads/"):]))
+
+
+def test_rendered_variants_change_the_catalog_etag(client, db_session, monkeypatch):
+    monkeypatch.setattr(images, "VARIANTS", {"thumb": 64})
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    sha = "cd" * 32
+    image_url = f"/uploads/cd/cd/{sha}.png"
+    os.makedirs(os.path.join(uploads.UPLOAD_DIR, "cd", "cd"))
+    with open(os.path.join(uploads.UPLOAD_DIR, "cd", "cd", f"{sha}.png"), "wb") as f:
+        f.write(png_bytes())
+    db_session.add(models.Product(name="Poster", price=4.0, image=image_url))
+    db_session.commit()
+
+    first = client.get("/products/", headers=headers)
+    assert first.json()["items"][0]["variants"] == {}
+
+    images.schedule_variants(image_url)
+    res = client.get("/products/", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert res.status_code == 200
+    assert res.json()["items"][0]["variants"] == {"thumb": f"/uploads/cd/cd/{sha}_thumb.webp"}
+
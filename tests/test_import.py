@@ -0,0 +1,139 @@
+import io
+import json
+
+import pytest
+
+from app import models
+from app.utils import imports
+from app.utils.catalog import catalog_version
+from .test_products import create_admin_and_get_token
+
+
+def test_import_csv_inserts_and_updates(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    existing = models.Product(name="Old", description="keep me", price=1.0, stripe_price_id="price_old")
+    db_session.add(existing)
+    db_session.commit()
+    existing_id = existing.id
+
+    body = f"id,name,description,price\n{existing_id},Renamed,,2.5\n,Lamp,Bright,30\n,Chair,,12\n"
+    res = client.post(
+        "/products/import?batch_size=2",
+        files={"file": ("catalog.csv", body, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.json() == {"received": 3, "upserted": 3, "failed": 0, "errors": [], "errors_truncated": False}
+
+    db_session.expire_all()
+    updated = db_session.get(models.Product, existing_id)
+    assert (updated.name, updated.description, updated.price) == ("Renamed", "keep me", 2.5)
+    assert updated.stripe_price_id is None
+    assert {p.name for p in db_session.query(models.Product)} == {"Renamed", "Lamp", "Chair"}
+
+
+def test_import_ndjson_reports_bad_rows(client, db_session, monkeypatch):
+    token = create_admin_and_get_token(client, db_session)
+    monkeypatch.setattr(imports, "IMPORT_MAX_ERRORS", 2)
+    lines = [
+        json.dumps({"name": "Good", "price": 3}),
+        "{not json",
+        json.dumps({"name": "", "price": 3}),
+        json.dumps({"name": "Free", "price": -1}),
+    ]
+    res = client.post(
+        "/products/import",
+        files={"file": ("catalog.ndjson", "\n".join(lines), "application/x-ndjson")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    report = res.json()
+    assert (report["received"], report["upserted"], report["failed"]) == (4, 1, 3)
+    assert [e["line"] for e in report["errors"]] == [2, 3]
+    assert report["errors_truncated"] is True
+    assert "name" in report["errors"][1]["error"]
+
+
+def test_import_requires_admin(client, db_session):
+    res = client.post("/products/import", files={"file": ("catalog.csv", "name,price\nA,1\n", "text/csv")})
+    assert res.status_code == 401
+
+
+def test_bulk_create_users_reports_duplicates(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    body = (
+        "first_name,last_name,email,password,user_type\n"
+        "Ann,One,ann@example.com,pw1,normal\n"
+        "Dup,Admin,admin@example.com,pw2,normal\n"
+        "Ann,Again,ann@example.com,pw3,normal\n"
+        "No,Password,nopw@example.com,,normal\n"
+        "Bob,Two,bob@example.com,pw4,admin\n"
+    )
+    res = client.post(
+        "/bulk",
+        files={"file": ("seats.csv", body, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    report = res.json()
+    assert (report["received"], report["created"], report["duplicates"], report["failed"]) == (5, 2, 2, 1)
+    assert report["duplicate_rows"] == [
+        {"line": 3, "email": "admin@example.com"},
+        {"line": 4, "email": "ann@example.com"},
+    ]
+    assert report["errors"][0]["line"] == 5
+
+    login = client.post("/login", json={"email": "bob@example.com", "password": "pw4"})
+    assert login.status_code == 200
+
+
+def test_bulk_create_users_defaults_missing_user_type(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    csv_body = "first_name,last_name,email,password,user_type\nBlank,Cell,blank@example.com,pw1,\n"
+    ndjson_body = json.dumps({"first_name": "Null", "last_name": "Type", "email": "null@example.com", "password": "pw2", "user_type": None}) + "\n"
+    for name, body, media_type in (("seats.csv", csv_body, "text/csv"), ("seats.ndjson", ndjson_body, "application/x-ndjson")):
+        res = client.post("/bulk", files={"file": (name, body, media_type)}, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code == 200
+        assert res.json()["created"] == 1
+
+    users = db_session.query(models.User).filter(models.User.email.in_(["blank@example.com", "null@example.com"])).all()
+    assert [user.user_type.value for user in users] == ["normal", "normal"]
+
+
+def test_cli_import_users(tmp_path, db_session, monkeypatch, capsys):
+    from app import cli
+    from .conftest import TestingSessionLocal
+
+    monkeypatch.setattr(cli, "sessionlocal", TestingSessionLocal)
+    path = tmp_path / "seats.ndjson"
+    path.write_text(json.dumps({"first_name": "C", "last_name": "L", "email": "cli@example.com", "password": "pw"}) + "\n")
+
+    assert cli.main(["import-users", str(path)]) == 0
+    assert json.loads(capsys.readouterr().out)["created"] == 1
+    assert db_session.query(models.User).filter_by(email="cli@example.com").count() == 1
+
+
+class BrokenUpload(io.RawIOBase):
+    """A file whose connection drops after ``data`` was read."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.data:
+            raise ConnectionResetError("client went away")
+        size = min(len(buffer), len(self.data))
+        buffer[:size], self.data = self.data[:size], self.data[size:]
+        return size
+
+
+def test_import_publishes_each_committed_batch(db_session):
+    before = catalog_version.etag
+    with pytest.raises(ConnectionResetError):
+        imports.import_products(db_session, BrokenUpload(b"name,price\nLamp,30\n"), "csv", batch_size=1)
+    # The first batch committed before the upload broke, and workers heard about it
+    assert db_session.query(models.Product).count() == 1
+    assert catalog_version.etag != before
+
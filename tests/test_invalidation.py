@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from app.models.cache_invalidation import CacheInvalidation
+from app.utils.catalog import CatalogVersion
+from app.utils.invalidation import InvalidationBus
+from .conftest import TestingSessionLocal, engine
+
+
+class Worker:
+    """One process's view: its own bus, caches and polling connection."""
+
+    def __init__(self):
+        self.bus = InvalidationBus(enabled=True, engine=engine, session_factory=TestingSessionLocal)
+        self.catalog = CatalogVersion()
+        self.principals = []
+        self.bus.subscribe("catalog", self.catalog.advance)
+        self.bus.subscribe("principal", lambda key, change_id: self.principals.append(key))
+        self.conn = engine.connect()
+        self.bus.poll(self.conn)
+        self.principals.clear()
+
+
+@pytest.fixture
+def workers(db_session):
+    pair = Worker(), Worker()
+    yield pair
+    for worker in pair:
+        worker.conn.close()
+
+
+def test_other_worker_applies_committed_invalidation(workers):
+    a, b = workers
+    with TestingSessionLocal() as db:
+        a.bus.publish(db, "principal", "old@example.com", "new@example.com")
+        db.commit()
+
+    # The writer applies on commit, the other worker on its next poll
+    assert a.principals == ["old@example.com", "new@example.com"]
+    assert b.principals == []
+    assert b.bus.poll(b.conn) == 2
+    assert b.principals == ["old@example.com", "new@example.com"]
+    assert b.bus.poll(b.conn) == 0
+    assert a.bus.stats()["published"] == 2
+    assert b.bus.stats()["received"] == 2
+
+
+def test_rolled_back_write_publishes_nothing(workers):
+    a, b = workers
+    with TestingSessionLocal() as db:
+        a.bus.publish(db, "principal", "gone@example.com")
+        db.rollback()
+        db.commit()
+        a.bus.publish(db, "principal", "closed@example.com")
+        db.close()
+        db.commit()
+        assert db.query(CacheInvalidation).count() == 0
+    b.bus.poll(b.conn)
+    assert a.principals == b.principals == []
+
+
+def test_workers_agree_on_catalog_etag(workers):
+    a, b = workers
+    assert a.catalog.etag == b.catalog.etag
+    before = a.catalog.etag
+
+    with TestingSessionLocal() as db:
+        a.bus.publish(db, "catalog")
+        db.commit()
+    b.bus.poll(b.conn)
+    assert a.catalog.etag == b.catalog.etag != before
+
+
+def test_late_poll_resyncs_and_old_rows_are_pruned(workers):
+    a, b = workers
+    with TestingSessionLocal() as db:
+        for key in ("x@example.com", "y@example.com"):
+            db.add(CacheInvalidation(topic="principal", key=key, created_at=time.time() - 7200))
+        db.commit()
+
+    b.bus._last_poll = time.time() - b.bus.retention - 1
+    b.bus.poll(b.conn)
+    assert b.principals == [None]
+    assert b.bus.stats()["resyncs"] == 2
+
+    a.bus.prune()
+    with TestingSessionLocal() as db:
+        assert [row.key for row in db.query(CacheInvalidation)] == ["y@example.com"]
+
+
+def test_resync_after_prune_never_reuses_a_catalog_version(workers):
+    a, b = workers
+    empty_log_etag = a.catalog.etag
+    with TestingSessionLocal() as db:
+        a.bus.publish(db, "catalog")
+        a.bus.publish(db, "principal", "x@example.com")
+        db.commit()
+        db.query(CacheInvalidation).update({"created_at": time.time() - 7200})
+        db.commit()
+    a.bus.prune()
+
+    # A worker started now only finds the principal row, yet must not fall back to the empty log's version
+    late = Worker()
+    try:
+        assert (empty_log_etag, a.catalog.etag, late.catalog.etag) == ('"log.0"', '"log.1"', '"log.2"')
+    finally:
+        late.conn.close()
+
+
+def test_disabled_bus_only_applies_locally(db_session):
+    bus = InvalidationBus(enabled=False)
+    catalog = CatalogVersion()
+    bus.subscribe("catalog", catalog.advance)
+    before = catalog.etag
+    bus.publish(db_session, "catalog")
+    db_session.commit()
+    assert catalog.etag != before
+    assert db_session.query(CacheInvalidation).count() == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from app import models
+from app.utils import invoices, job_queue, pdf_generator
+from app.utils.templates import SafeHTML, TemplateRegistry, render_invoice
+from .conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def inline_pdfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_generator, "PDF_POOL_WORKERS", 0)
+    monkeypatch.setattr(pdf_generator, "INVOICES_DIR", str(tmp_path / "invoices"))
+    return tmp_path / "invoices"
+
+
+def test_template_values_are_escaped():
+    registry = TemplateRegistry()
+    registry.register("greeting", "<p>$name</p>$extra")
+    assert registry.render("greeting", name="<b>", extra=SafeHTML("<i>ok</i>")) == "<p>&lt;b&gt;</p><i>ok</i>"
+
+
+def test_pdf_and_email_share_invoice_details():
+    pdf_html = render_invoice("invoice_pdf", "cs_123", 19.99)
+    email_html = render_invoice("invoice_email", "cs_123", 19.99)
+    for html in (pdf_html, email_html):
+        assert "cs_123" in html
+        assert "19.99 USD" in html
+
+
+def test_render_invoices_batch_returns_pdf_bytes(inline_pdfs):
+    pdfs = pdf_generator.render_invoices([("cs_1", 1.0), ("cs_2", 2.5)])
+    assert len(pdfs) == 2
+    assert all(pdf.startswith(b"%PDF") for pdf in pdfs)
+
+
+def test_generate_invoice_pdf_writes_file(inline_pdfs):
+    path = pdf_generator.generate_invoice_pdf("cs_file", 5.0)
+    assert path == str(inline_pdfs / "invoice_cs_file.pdf")
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+
+def test_pdf_failure_reaches_dead_letter(db_session, inline_pdfs, monkeypatch):
+    def broken(session_id, amount):
+        raise ValueError("template exploded")
+
+    monkeypatch.setattr(pdf_generator, "render_invoice_pdf", broken)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 1)
+    job_queue.enqueue(db_session, invoices.CHECKOUT_COMPLETED_JOB, {"session_id": "cs_bad", "amount_paid": 1.0, "customer_email": None})
+    db_session.commit()
+
+    job_queue.run_pending(TestingSessionLocal)
+    assert "template exploded" in db_session.query(models.DeadLetterJob).one().last_error
+
@@ -0,0 +1,97 @@
+from uuid import uuid4
+
+import stripe
+
+from app import models
+from app.utils import invoices, job_queue
+from .conftest import TestingSessionLocal
+
+
+def checkout_event(session_id="cs_test_1", event_id=None):
+    return {
+        "id": event_id or f"evt_{uuid4().hex}",
+        "type": "checkout.session.completed",
+        "data": {"object": {
+            "id": session_id,
+            "amount_total": 1999,
+            "customer_details": {"email": "buyer@example.com"},
+        }},
+    }
+
+
+def test_webhook_enqueues_invoice_job(client, db_session, monkeypatch):
+    monkeypatch.setattr("stripe.Webhook.construct_event", lambda payload, sig, secret: checkout_event())
+    sent = []
+    monkeypatch.setattr(invoices, "generate_invoice_pdf", lambda session_id, amount: f"/tmp/invoice_{session_id}.pdf")
+    monkeypatch.setattr(invoices, "send_invoice_email", lambda **kwargs: sent.append(kwargs))
+
+    res = client.post("/products/webhook", content=b"{}", headers={"stripe-signature": "t=1,v1=x"})
+    assert res.status_code == 200
+    assert sent == []
+
+    job = db_session.query(models.Job).one()
+    assert job.kind == invoices.CHECKOUT_COMPLETED_JOB
+
+    assert job_queue.run_pending(TestingSessionLocal) == 1
+    assert sent[0]["to_email"] == "buyer@example.com"
+    assert sent[0]["pdf_path"] == "/tmp/invoice_cs_test_1.pdf"
+    assert db_session.query(models.Job).count() == 0
+
+
+def test_job_payload_from_stripe_object():
+    # construct_event returns StripeObjects, not dicts
+    session = stripe.StripeObject.construct_from(checkout_event()["data"]["object"], "sk_test")
+    assert invoices.checkout_job_payload(session) == {
+        "session_id": "cs_test_1",
+        "amount_paid": 19.99,
+        "customer_email": "buyer@example.com",
+    }
+
+
+def test_failing_job_retried_then_dead_lettered(db_session, monkeypatch):
+    attempts = []
+
+    @job_queue.job_handler("test.always_fails")
+    def always_fails(payload):
+        attempts.append(payload)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempts: 0)
+    job_queue.enqueue(db_session, "test.always_fails", {"n": 1})
+    db_session.commit()
+
+    job_queue.run_pending(TestingSessionLocal)
+
+    assert len(attempts) == 3
+    assert db_session.query(models.Job).count() == 0
+    dead = db_session.query(models.DeadLetterJob).one()
+    assert dead.attempts == 3
+    assert "boom" in dead.last_error
+
+
+def test_retry_is_delayed_with_backoff(db_session, monkeypatch):
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempts: 60)
+
+    @job_queue.job_handler("test.fails_once")
+    def fails_once(payload):
+        raise RuntimeError("try later")
+
+    job_queue.enqueue(db_session, "test.fails_once", {})
+    db_session.commit()
+
+    assert job_queue.run_pending(TestingSessionLocal) == 1
+    db_session.expire_all()
+    job = db_session.query(models.Job).one()
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert "try later" in job.last_error
+
+
+def test_retry_delay_grows_exponentially(monkeypatch):
+    monkeypatch.setattr(job_queue.random, "uniform", lambda low, high: high)
+    assert [job_queue.retry_delay(n) for n in (1, 2, 3)] == [
+        job_queue.JOB_RETRY_BASE_SECONDS,
+        job_queue.JOB_RETRY_BASE_SECONDS * 2,
+        job_queue.JOB_RETRY_BASE_SECONDS * 4,
+    ]
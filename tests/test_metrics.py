@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import models
+from app.utils import metrics
+from app.utils.metrics import MetricsMiddleware, RequestMetrics, instrument_engine, request_metrics
+from .conftest import engine
+from .test_products import create_admin_and_get_token
+
+
+@pytest.fixture
+def instrumented_engine():
+    instrument_engine(engine)
+    request_metrics.reset()
+    yield engine
+    event.remove(engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", metrics._after_cursor_execute)
+    event.remove(engine, "handle_error", metrics._handle_error)
+
+
+def sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found in:\n{body}")
+
+
+def test_metrics_per_route_latency_and_sql(client, db_session, instrumented_engine):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    db_session.add(models.Product(name="Bottle", description="Steel", price=9.5))
+    db_session.commit()
+
+    for product_id in (1, 2):
+        client.get(f"/products/{product_id}", headers=headers)
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = res.text
+
+    route = 'method="GET",route="/products/{product_id}"'
+    # Both ids land on one route template, split by status
+    assert sample(body, 'http_request_duration_seconds_count{' + route + ',status="200"}') == 1
+    assert sample(body, 'http_request_duration_seconds_count{' + route + ',status="404"}') == 1
+    assert sample(body, 'http_request_db_statements_count{' + route + '}') == 2
+    assert sample(body, 'http_request_db_statements_sum{' + route + '}') >= 2
+    assert sample(body, 'http_request_db_seconds_total{' + route + '}') > 0
+    assert sample(body, 'http_requests_in_flight{method="GET"}') == 1  # the /metrics request itself
+    assert sample(body, "principal_cache_hits_total") >= 1
+
+
+def test_metrics_count_async_statements():
+    async_engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(async_engine.sync_engine)
+    registry = RequestMetrics()
+
+    async def get_conn():
+        async with async_engine.connect() as conn:
+            yield conn
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=registry)
+
+    @app.get("/twice")
+    async def twice(conn=Depends(get_conn)):
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("SELECT 2"))
+        return {}
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/twice")).status_code == 200
+        await async_engine.dispose()
+
+    asyncio.run(call())
+    body = registry.render()
+    assert sample(body, 'http_request_db_statements_sum{method="GET",route="/twice"}') == 2
+    assert sample(body, 'http_requests_in_flight{method="GET"}') == 0
+
+
+def test_failed_statement_leaves_no_start_behind(instrumented_engine):
+    token = metrics._request_sql.set([0, 0.0])
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert conn.info["metrics_query_start"] == []
+    finally:
+        metrics._request_sql.reset(token)
+
@@ -0,0 +1,58 @@
+from app import models
+from app.auth.cache import Principal, PrincipalCache, principal_cache
+from app.auth.hashing import Hasher
+from .test_products import create_admin_and_get_token
+
+
+def make_principal(email):
+    return Principal(id=1, first_name="A", last_name="B", email=email, user_type="normal")
+
+
+def test_principal_cache_lru_and_ttl():
+    now = [0.0]
+    cache = PrincipalCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", make_principal("a"))
+    cache.set("b", make_principal("b"))
+    assert cache.get("a").email == "a"
+
+    cache.set("c", make_principal("c"))  # evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_get_current_user_served_from_cache(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = principal_cache.stats()
+    client.get("/products/", headers=headers)
+    client.get("/products/", headers=headers)
+    stats = client.get("/cache/principals", headers=headers).json()
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 2
+
+
+def test_delete_user_invalidates_principal(client, db_session):
+    admin_token = create_admin_and_get_token(client, db_session)
+    db_session.add(models.User(
+        first_name="Gone",
+        last_name="Soon",
+        email="gone@example.com",
+        password=Hasher.get_password_hash("gonepass"),
+        user_type="normal"
+    ))
+    db_session.commit()
+    user_token = client.post("/login", json={"email": "gone@example.com", "password": "gonepass"}).json()["access_token"]
+
+    assert client.get("/products/", headers={"Authorization": f"Bearer {user_token}"}).status_code == 200
+    assert principal_cache.get("gone@example.com") is not None
+
+    user_id = db_session.query(models.User).filter(models.User.email == "gone@example.com").first().id
+    client.delete(f"/{user_id}", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert principal_cache.get("gone@example.com") is None
+    assert client.get("/products/", headers={"Authorization": f"Bearer {user_token}"}).status_code == 401
@@ -1,7 +1,17 @@
+import io
+
+from PIL import Image
+
 from app import models
 from app.auth.hashing import Hasher
+from app.crud.product import encode_cursor
 
 
+def image_bytes(color=(200, 30, 30), size=(8, 8), fmt="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
 
 def create_admin_and_get_token(client, db_session):
     hashed_pw = Hasher.get_password_hash("adminpass")
@@ -26,25 +36,33 @@ def create_admin_and_get_token(client, db_session):
 def test_create_product(client, db_session):
     token = create_admin_and_get_token(client, db_session)
 
-    with open("tests/test_image.jpg", "wb") as f:
-        f.write(b"fake image content")
-
-    with open("tests/test_image.jpg", "rb") as img_file:
-        res = client.post(
-            "/products/",
-            headers={"Authorization": f"Bearer {token}"},
-            data={
-                "name": "Bottle",
-                "description": "Steel bottle",
-                "price": "99.99"
-            },
-            files={"image": ("test.jpg", img_file, "image/jpeg")}
-        )
+    res = client.post(
+        "/products/",
+        headers={"Authorization": f"Bearer {token}"},
+        data={
+            "name": "Bottle",
+            "description": "Steel bottle",
+            "price": "99.99"
+        },
+        files={"image": ("test.jpg", image_bytes(fmt="JPEG"), "image/jpeg")}
+    )
 
     assert res.status_code == 200
     assert res.json()["name"] == "Bottle"
 
 
+def test_create_product_rejects_non_image(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    res = client.post(
+        "/products/",
+        headers={"Authorization": f"Bearer {token}"},
+        data={"name": "Bottle", "price": "1"},
+        files={"image": ("test.jpg", b"fake image content", "image/jpeg")}
+    )
+    assert res.status_code == 415
+    assert db_session.query(models.Product).count() == 0
+
+
 
 def test_get_all_products(client, db_session):
     # Create a normal user
@@ -71,7 +89,56 @@ def test_get_all_products(client, db_session):
         headers={"Authorization": f"Bearer {token}"}
     )
     assert res.status_code == 200
-    assert isinstance(res.json(), list)
+    assert isinstance(res.json()["items"], list)
+
+
+def seed_products(db_session, prices):
+    for i, price in enumerate(prices):
+        db_session.add(models.Product(name=f"Item {i}", description="seeded", price=price, image=None))
+    db_session.commit()
+
+
+def test_get_products_keyset_pages(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    seed_products(db_session, [5.0, 1.0, 3.0, 3.0, 2.0])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "sort": "price"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/products/", headers=headers, params=params).json()
+        seen.extend((p["price"], p["id"]) for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+def test_get_products_filters(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    seed_products(db_session, [5.0, 1.0, 3.0])
+    db_session.add(models.Product(name="Other", description="seeded", price=2.0, image=None))
+    db_session.commit()
+
+    res = client.get("/products/", headers=headers, params={"min_price": 2, "max_price": 4})
+    assert sorted(p["price"] for p in res.json()["items"]) == [2.0, 3.0]
+
+    res = client.get("/products/", headers=headers, params={"name_prefix": "Item", "sort": "name", "order": "desc"})
+    assert [p["name"] for p in res.json()["items"]] == ["Item 2", "Item 1", "Item 0"]
+
+    res = client.get("/products/", headers=headers, params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+    # Decodable, but carrying a value the sort column cannot be compared with
+    for sort, value in (("price", [1]), ("price", "2"), ("name", {"a": 1}), ("name", 3)):
+        cursor = encode_cursor(sort, "asc", value, 1)
+        res = client.get("/products/", headers=headers, params={"cursor": cursor, "sort": sort})
+        assert res.status_code == 400
 
 
 
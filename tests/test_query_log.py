@@ -0,0 +1,93 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+
+from app.models.user import User
+from app.routers import user as user_router
+from app.utils import query_log
+from app.utils.query_log import QueryLogMiddleware, QueryStats, instrument_queries, statement_shape
+from .conftest import engine
+from .test_products import create_admin_and_get_token
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = QueryStats(maxsize=100, slow_ms=1000, n_plus_one=3)
+    monkeypatch.setattr(query_log, "query_stats", stats)
+    monkeypatch.setattr(user_router, "query_stats", stats)
+    instrument_queries(engine)
+    yield stats
+    event.remove(engine, "before_cursor_execute", query_log._before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", query_log._after_cursor_execute)
+    event.remove(engine, "handle_error", query_log._handle_error)
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT id FROM users\n WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT id FROM users WHERE id IN (?,?)"
+    ) == "SELECT id FROM users WHERE id IN (?, ...)"
+
+
+def test_slow_query_logged_with_plan(client, db_session, stats, caplog):
+    token = create_admin_and_get_token(client, db_session)
+    stats.slow_ms = 0
+
+    with caplog.at_level(logging.WARNING, logger="app.utils.query_log"):
+        res = client.get("/check-role", params={"email": "admin@example.com"}, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Slow query")]
+    lookup = next(message for message in slow if "WHERE users.email = ?" in message)
+    assert "admin@example.com" not in lookup
+    assert "parameters: (str" in lookup
+    assert "SEARCH users USING INDEX" in lookup
+
+    report = client.get("/stats/queries", headers={"Authorization": f"Bearer {token}"}).json()
+    assert report["enabled"] is False
+    assert any("WHERE users.email = ?" in entry["statement"] and entry["slow"] for entry in report["statements"])
+
+
+def test_parameter_values_logged_only_on_opt_in(stats, monkeypatch, caplog):
+    assert query_log.redact_parameters(("a@example.com", 3, None)) == "(str, int, NoneType)"
+    assert query_log.redact_parameters([("a", 1), ("b", 2)], executemany=True) == "2 rows of (str, int)"
+
+    stats.slow_ms = 0
+    monkeypatch.setattr(query_log, "QUERY_LOG_PARAMETERS", True)
+    with caplog.at_level(logging.WARNING, logger="app.utils.query_log"), engine.connect() as conn:
+        conn.execute(select(User.id).where(User.email == "debug@example.com"))
+    assert any("'debug@example.com'" in r.getMessage() for r in caplog.records)
+
+
+def test_failed_statement_leaves_no_start_behind(stats):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["query_log_start"] == []
+        conn.execute(select(User.id))
+        assert conn.info["query_log_start"] == []
+
+
+def test_repeated_statement_flagged_as_n_plus_one(db_session, stats):
+    app = FastAPI()
+    app.add_middleware(QueryLogMiddleware, stats=stats)
+
+    @app.get("/loop/{count}")
+    def loop(count: int):
+        with engine.connect() as conn:
+            for user_id in range(count):
+                conn.execute(select(User.email).where(User.id == user_id))
+        return {}
+
+    client = TestClient(app)
+    client.get("/loop/3")
+    assert stats.stats()["n_plus_one"] == []
+
+    client.get("/loop/5")
+    [finding] = stats.stats()["n_plus_one"]
+    assert finding["route"] == "/loop/{count}"
+    assert finding["count"] == 5
+    assert finding["statement"].startswith("SELECT users.email")
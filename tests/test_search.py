@@ -0,0 +1,89 @@
+from app import models
+from app.crud.product import encode_cursor, fts_match_expression, search_products_page
+from .test_products import create_admin_and_get_token
+
+
+def seed(db_session):
+    db_session.add_all([
+        models.Product(name="Steel water bottle", description="Keeps drinks cold", price=20),
+        models.Product(name="Desk lamp", description="Warm light, steel base", price=35),
+        models.Product(name="Café mug", description="Ceramic", price=8),
+        models.Product(name="Notebook", description="Dotted paper", price=5),
+    ])
+    db_session.commit()
+
+
+def search(client, headers, **params):
+    res = client.get("/products/search", params=params, headers=headers)
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_search_ranks_name_matches_first(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    seed(db_session)
+
+    names = [p["name"] for p in search(client, headers, q="steel")["items"]]
+    assert names == ["Steel water bottle", "Desk lamp"]
+    # Prefix matching, diacritics folded, every word required
+    assert [p["name"] for p in search(client, headers, q="cafe mu")["items"]] == ["Café mug"]
+    assert search(client, headers, q="steel mug")["items"] == []
+    # Quotes and FTS operators in the input are treated as plain words
+    assert search(client, headers, q='lamp" OR NEAR(')["items"] == []
+
+
+def test_search_pagination_and_index_sync(client, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    db_session.add_all(models.Product(name=f"Widget {i}", price=i) for i in range(5))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "widg", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = search(client, headers, **params)
+        seen += [p["name"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == [f"Widget {i}" for i in range(5)]
+
+    widget = db_session.query(models.Product).filter_by(name="Widget 0").one()
+    widget.name = "Gadget"
+    db_session.commit()
+    db_session.delete(db_session.query(models.Product).filter_by(name="Widget 1").one())
+    db_session.commit()
+    assert len(search(client, headers, q="widget", limit=10)["items"]) == 3
+    assert [p["name"] for p in search(client, headers, q="gadget")["items"]] == ["Gadget"]
+
+    # A cursor only continues the query it came from
+    cursor = search(client, headers, q="widget", limit=1)["next_cursor"]
+    bad = client.get("/products/search", params={"q": "gadget", "cursor": cursor}, headers=headers)
+    assert bad.status_code == 400
+
+    forged = encode_cursor("rank", fts_match_expression("widget"), [["x"], None], 1)
+    bad = client.get("/products/search", params={"q": "widget", "cursor": forged}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_match_expression_prefixes_last_word():
+    assert fts_match_expression("desk la") == '"desk" "la"*'
+    assert fts_match_expression("  ?! ") is None
+
+
+def test_search_ranks_newest_candidates_only(db_session):
+    db_session.add_all(models.Product(name=f"Widget {i}", price=i) for i in range(6))
+    db_session.commit()
+    match = fts_match_expression("widget")
+
+    seen, cursor = [], None
+    while True:
+        page = search_products_page(db_session, match, 2, cursor, max_candidates=4)
+        seen += [p.name for p in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == [f"Widget {i}" for i in range(2, 6)]
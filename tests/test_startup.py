@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+from app.main import create_app
+
+
+def test_importing_app_skips_optional_integrations():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('stripe', 'httpx', 'xhtml2pdf', 'reportlab') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_create_app_builds_independent_apps():
+    # No lifespan: it would start the workers against the default database
+    first, second = create_app(), create_app()
+    assert first is not second
+    schema = first.openapi()
+    assert "BearerAuth" in schema["components"]["securitySchemes"]
+    assert second.openapi_schema is None
@@ -1,5 +1,31 @@
+from types import SimpleNamespace
+
 from app import models
-from .conftest import create_user, get_token
+from app.utils import stripe as stripe_utils
+from .conftest import TestingSessionLocal, create_user, get_token
+from .test_products import create_admin_and_get_token
+
+
+def mock_stripe(monkeypatch):
+    calls = {"product": 0, "price": 0, "line_items": []}
+
+    def product_create(**kwargs):
+        calls["product"] += 1
+        return SimpleNamespace(id=f"prod_{calls['product']}")
+
+    def price_create(**kwargs):
+        calls["price"] += 1
+        return SimpleNamespace(id=f"price_{calls['price']}")
+
+    def session_create(**kwargs):
+        calls["line_items"].append(kwargs["line_items"])
+        return SimpleNamespace(url="http://mock-checkout.com")
+
+    monkeypatch.setattr("stripe.Product.create", product_create)
+    monkeypatch.setattr("stripe.Price.create", price_create)
+    monkeypatch.setattr("stripe.checkout.Session.create", session_create)
+    return calls
+
 
 def test_checkout_session_mock(client, monkeypatch, db_session):
     user = create_user(db_session, "pay@example.com", "pass")
@@ -9,12 +35,68 @@ def test_checkout_session_mock(client, monkeypatch, db_session):
     db_session.add(product)
     db_session.commit()
 
-    def mock_checkout_session_create(**kwargs):
-        return type("obj", (object,), {"url": "http://mock-checkout.com"})
-
-    monkeypatch.setattr("stripe.checkout.Session.create", mock_checkout_session_create)
+    mock_stripe(monkeypatch)
 
     response = client.post(f"/products/checkout-session/{product.id}",
                            headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert "checkout_url" in response.json()
+
+
+def test_checkout_reuses_stripe_price_until_price_changes(client, monkeypatch, db_session):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    product = models.Product(name="Mug", description="desc", price=8.0, image="/uploads/img.jpg")
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+    calls = mock_stripe(monkeypatch)
+
+    before = client.get("/products/cache/stripe-prices", headers=headers).json()
+    for _ in range(2):
+        assert client.post(f"/products/checkout-session/{product_id}", headers=headers).status_code == 200
+    assert (calls["product"], calls["price"]) == (1, 1)
+    assert calls["line_items"][-1] == [{"price": "price_1", "quantity": 1}]
+
+    client.put(f"/products/{product_id}", data={"price": "9.5"}, headers=headers)
+    client.post(f"/products/checkout-session/{product_id}", headers=headers)
+    assert (calls["product"], calls["price"]) == (1, 2)
+    assert calls["line_items"][-1] == [{"price": "price_2", "quantity": 1}]
+
+    stats = client.get("/products/cache/stripe-prices", headers=headers).json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+
+
+def test_idempotency_keys_cover_every_parameter(monkeypatch):
+    keys = []
+    monkeypatch.setattr("stripe.Product.create", lambda **kwargs: keys.append(kwargs["idempotency_key"]) or SimpleNamespace(id="prod_1"))
+    monkeypatch.setattr("stripe.Price.create", lambda **kwargs: SimpleNamespace(id="price_1"))
+
+    # Renamed back within Stripe's 24h window, but with a new description
+    for description in ("Blue", "Green", "Blue"):
+        stripe_utils.sync_stripe_price(models.Product(id=7, name="Mug", description=description, price=8.0))
+    assert keys[0] == keys[2] != keys[1]
+
+
+def test_sync_does_not_store_ids_for_a_price_changed_meanwhile(monkeypatch, db_session):
+    product = models.Product(name="Mug", description="desc", price=8.0, image="/uploads/img.jpg")
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+
+    def price_create(**kwargs):
+        # update_product commits from another request while Stripe is called
+        with TestingSessionLocal() as other:
+            other.get(models.Product, product_id).price = 9.5
+            other.commit()
+        return SimpleNamespace(id="price_1")
+
+    monkeypatch.setattr("stripe.Product.create", lambda **kwargs: SimpleNamespace(id="prod_1"))
+    monkeypatch.setattr("stripe.Price.create", price_create)
+    assert stripe_utils.ensure_stripe_price(db_session, product) == "price_1"
+
+    with TestingSessionLocal() as fresh:
+        stored = fresh.get(models.Product, product_id)
+        assert (stored.price, stored.stripe_price_id) == (9.5, None)
+
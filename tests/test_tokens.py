@@ -0,0 +1,64 @@
+import time
+
+from app.auth import tokens
+from app.auth.tokens import TokenService
+from app.utils import jwt as jwt_utils
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeated_token_skips_verification(monkeypatch):
+    service = TokenService(secret_key="test-secret", cache_size=8)
+    token = service.create_access_token({"sub": "a@example.com", "user_type": "normal"})
+
+    verified = []
+    decode = tokens.jwt.decode
+    monkeypatch.setattr(tokens.jwt, "decode", lambda *args, **kwargs: verified.append(1) or decode(*args, **kwargs))
+
+    first = service.decode(token)
+    first["sub"] = "changed by caller"
+    second = service.decode(token)
+    assert second["sub"] == "a@example.com"
+    assert len(verified) == 1
+    assert service.stats() == {"size": 1, "maxsize": 8, "hits": 1, "misses": 1}
+
+
+def test_cached_entry_expires_with_token():
+    clock = FakeClock()
+    service = TokenService(secret_key="test-secret", expire_minutes=1, clock=clock)
+    token = service.create_access_token({"sub": "a@example.com", "user_type": "normal"})
+    service.decode(token)
+
+    clock.now += 61
+    service.decode(token)
+    assert service.stats()["hits"] == 0
+    assert service.stats()["misses"] == 2
+
+
+def test_invalid_tokens_rejected_and_not_cached():
+    service = TokenService(secret_key="test-secret")
+    other = TokenService(secret_key="other-secret")
+    forged = other.create_access_token({"sub": "a@example.com", "user_type": "admin"})
+
+    assert service.decode(forged) is None
+    assert service.decode("not-a-token") is None
+    assert service.stats()["size"] == 0
+
+
+def test_cache_size_zero_disables_cache():
+    service = TokenService(secret_key="test-secret", cache_size=0)
+    token = service.create_access_token({"sub": "a@example.com", "user_type": "normal"})
+    assert service.decode(token)["sub"] == service.decode(token)["sub"] == "a@example.com"
+    assert service.stats()["hits"] == 0
+
+
+def test_legacy_module_shares_the_token_service():
+    token = jwt_utils.create_access_token({"sub": "a@example.com", "user_type": "normal"})
+    assert tokens.verify_token(token)["sub"] == "a@example.com"
+    assert jwt_utils.verify_token is tokens.verify_token
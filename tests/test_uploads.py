@@ -0,0 +1,136 @@
+import hashlib
+import os
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from app import models
+from app.utils import images, uploads
+from .conftest import TestingSessionLocal
+from .test_products import create_admin_and_get_token, image_bytes
+
+
+@pytest.fixture
+def upload_dir(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 4)
+    # Only the originals; derivatives are covered in test_images
+    monkeypatch.setattr(images, "VARIANTS", {})
+    return Path(uploads.UPLOAD_DIR)
+
+
+def stored_files(upload_dir):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), upload_dir)
+        for root, _, names in os.walk(upload_dir)
+        for name in names
+    )
+
+
+def post_product(client, token, content):
+    return client.post(
+        "/products/",
+        headers={"Authorization": f"Bearer {token}"},
+        data={"name": "Lamp", "description": "Desk lamp", "price": "12.5"},
+        files={"image": ("lamp.png", content, "image/png")}
+    )
+
+
+def test_upload_streamed_to_disk(client, db_session, upload_dir):
+    token = create_admin_and_get_token(client, db_session)
+
+    picture = image_bytes()
+    res = post_product(client, token, picture)
+    assert res.status_code == 200
+    digest = hashlib.sha256(picture).hexdigest()
+    assert res.json()["image"] == f"/uploads/{digest[:2]}/{digest[2:4]}/{digest}.png"
+    assert stored_files(upload_dir) == [f"{digest[:2]}/{digest[2:4]}/{digest}.png"]
+    assert (upload_dir / res.json()["image"][len("/uploads/"):]).read_bytes() == picture
+
+
+def test_upload_over_limit_rejected(client, db_session, upload_dir, monkeypatch):
+    token = create_admin_and_get_token(client, db_session)
+    monkeypatch.setattr(uploads, "UPLOAD_MAX_BYTES", 10)
+
+    res = post_product(client, token, b"0123456789abcdef")
+    assert res.status_code == 413
+    assert os.listdir(upload_dir) == []
+
+
+def test_identical_uploads_share_one_file(client, db_session, upload_dir):
+    token = create_admin_and_get_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = post_product(client, token, image_bytes((0, 0, 255))).json()
+    second = post_product(client, token, image_bytes((0, 0, 255))).json()
+    assert first["image"] == second["image"]
+    assert len(stored_files(upload_dir)) == 1
+    assert db_session.query(models.StoredImage).one().ref_count == 2
+
+    client.delete(f"/products/{first['id']}", headers=headers)
+    assert len(stored_files(upload_dir)) == 1
+
+    client.delete(f"/products/{second['id']}", headers=headers)
+    assert stored_files(upload_dir) == []
+    assert db_session.query(models.StoredImage).count() == 0
+
+
+def test_replacing_image_releases_old_file(client, db_session, upload_dir):
+    token = create_admin_and_get_token(client, db_session)
+    product = post_product(client, token, image_bytes((0, 255, 0))).json()
+
+    res = client.put(
+        f"/products/{product['id']}",
+        headers={"Authorization": f"Bearer {token}"},
+        files={"image": ("new.jpg", image_bytes((255, 255, 0), fmt="JPEG"), "image/jpeg")}
+    )
+    assert res.status_code == 200
+    digest = hashlib.sha256(image_bytes((255, 255, 0), fmt="JPEG")).hexdigest()
+    assert stored_files(upload_dir) == [f"{digest[:2]}/{digest[2:4]}/{digest}.jpg"]
+
+
+def stage(upload_dir, content):
+    part = upload_dir / f".{uuid4().hex}.part"
+    part.write_bytes(content)
+    return uploads.StagedUpload(str(part), hashlib.sha256(content).hexdigest(), len(content), ".png")
+
+
+def test_files_follow_the_transaction(db_session, upload_dir):
+    uploads.store_upload(db_session, stage(upload_dir, b"rolled back"))
+    db_session.rollback()
+    uploads.store_upload(db_session, stage(upload_dir, b"never committed"))
+    db_session.close()
+    assert stored_files(upload_dir) == []
+
+    url = uploads.store_upload(db_session, stage(upload_dir, b"kept"))
+    db_session.commit()
+    kept = [uploads.stored_path(url)]
+    assert stored_files(upload_dir) == kept
+
+    uploads.release_upload(db_session, url)
+    db_session.rollback()
+    assert stored_files(upload_dir) == kept
+
+    uploads.release_upload(db_session, url)
+    db_session.commit()
+    assert stored_files(upload_dir) == []
+
+
+def test_release_keeps_file_stored_again_before_removal(db_session, upload_dir, monkeypatch):
+    url = uploads.store_upload(db_session, stage(upload_dir, b"shared"))
+    db_session.commit()
+    remove = uploads._remove
+
+    def store_again_first(bind, path):
+        # Another transaction stores the same bytes and places them before our removal runs
+        with TestingSessionLocal() as other:
+            uploads.store_upload(other, stage(upload_dir, b"shared"))
+            other.commit()
+        remove(bind, path)
+
+    monkeypatch.setattr(uploads, "_remove", store_again_first)
+    uploads.release_upload(db_session, url)
+    db_session.commit()
+    assert stored_files(upload_dir) == [uploads.stored_path(url)]
+    assert (upload_dir / uploads.stored_path(url)).read_bytes() == b"shared"
+
@@ -1,5 +1,7 @@
 from app import models
-from app.auth.hashing import Hasher
+from app.auth.hashing import Hasher, pwd_context
+from app.config import BCRYPT_ROUNDS
+from passlib.hash import bcrypt
 from .conftest import create_user, get_token
 
 def test_register_user(client, db_session):
@@ -31,3 +33,25 @@ def test_get_current_user(client, db_session):
     response = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.json()["email"] == "me@example.com"
+
+def test_login_rehashes_outdated_cost(client, db_session):
+    cheap_rounds = 4 if BCRYPT_ROUNDS != 4 else 5
+    user = models.User(
+        first_name="Old",
+        last_name="Hash",
+        email="old@example.com",
+        password=bcrypt.using(rounds=cheap_rounds).hash("oldpass123"),
+        user_type="normal"
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/login", json={"email": "old@example.com", "password": "oldpass123"})
+    assert response.status_code == 200
+
+    stored = db_session.query(models.User).filter(models.User.email == "old@example.com").first().password
+    assert not pwd_context.needs_update(stored)
+    assert Hasher.verify_password("oldpass123", stored)
+
+    response = client.post("/login", json={"email": "old@example.com", "password": "wrong"})
+    assert response.status_code == 400
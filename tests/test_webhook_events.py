@@ -0,0 +1,60 @@
+import time
+from uuid import uuid4
+
+from app import models
+from app.utils.webhook_events import ProcessedEventStore, processed_events
+from .conftest import TestingSessionLocal
+from .test_jobs import checkout_event
+
+
+def post_webhook(client):
+    return client.post("/products/webhook", content=b"{}", headers={"stripe-signature": "t=1,v1=x"})
+
+
+def test_redelivered_event_is_suppressed(client, db_session, monkeypatch):
+    event = checkout_event(event_id=f"evt_{uuid4().hex}")
+    monkeypatch.setattr("stripe.Webhook.construct_event", lambda payload, sig, secret: event)
+    before = processed_events.stats()["duplicates_suppressed"]
+
+    assert post_webhook(client).json() == {"status": "success"}
+    assert post_webhook(client).json() == {"status": "duplicate"}
+
+    assert db_session.query(models.Job).count() == 1
+    assert db_session.query(models.ProcessedEvent).one().event_id == event["id"]
+    assert processed_events.stats()["duplicates_suppressed"] == before + 1
+
+
+def test_duplicate_caught_by_unique_index(client, db_session, monkeypatch):
+    event = checkout_event(event_id=f"evt_{uuid4().hex}")
+    monkeypatch.setattr("stripe.Webhook.construct_event", lambda payload, sig, secret: event)
+    assert post_webhook(client).json() == {"status": "success"}
+
+    # Another worker, which never saw the first delivery in memory
+    monkeypatch.setattr("app.routers.stripe_webhook.processed_events", ProcessedEventStore(100))
+    assert post_webhook(client).json() == {"status": "duplicate"}
+    assert db_session.query(models.Job).count() == 1
+
+
+def test_recent_ids_are_bounded():
+    store = ProcessedEventStore(2)
+    for event_id in ("a", "b", "c"):
+        store.remember(event_id)
+    assert not store.seen_recently("a")
+    assert store.seen_recently("c")
+
+
+def test_prune_drops_events_past_the_redelivery_window(db_session):
+    now = time.time()
+    db_session.add_all([
+        models.ProcessedEvent(event_id="evt_old", event_type="checkout.session.completed", processed_at=now - 200),
+        models.ProcessedEvent(event_id="evt_new", event_type="checkout.session.completed", processed_at=now - 50),
+    ])
+    db_session.commit()
+
+    store = ProcessedEventStore(10, retention=100)
+    assert store.prune(TestingSessionLocal) == 1
+    assert [e.event_id for e in db_session.query(models.ProcessedEvent)] == ["evt_new"]
+    # At most once per retention / 10
+    assert store.prune(TestingSessionLocal) == 0
+    assert store.stats()["pruned"] == 1
+